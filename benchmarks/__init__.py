@@ -0,0 +1 @@
+"""Benchmarks locales de los microservicios (no se incluyen en las imágenes)."""
@@ -0,0 +1,73 @@
+"""Entorno local de los benchmarks de carga.
+
+Sustituye Redis por fakeredis (un único servidor en memoria compartido por
+ambos servicios, como el ``users-redis`` de docker-compose) y apunta cada
+servicio a su propia base de datos: ficheros SQLite en el directorio de
+trabajo o las URLs de un PostgreSQL local si se indican. Las migraciones se
+aplican con Alembic igual que en los contenedores.
+
+``prepare`` tiene que llamarse antes de importar ``posts`` o ``users``: sus
+``settings``, motores y clientes de Redis se crean al importar los módulos.
+"""
+import os
+import sys
+from typing import Optional
+
+import fakeredis
+import fakeredis.aioredis
+import redis
+import redis.asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _patch_redis():
+    server = fakeredis.FakeServer()
+
+    def sync_client(*args, decode_responses: bool = False, **kwargs):
+        return fakeredis.FakeRedis(server=server, decode_responses=decode_responses)
+
+    def async_pool(*args, decode_responses: bool = False, **kwargs):
+        # Los servicios crean su cliente sobre BlockingConnectionPool.from_url
+        return fakeredis.aioredis.FakeRedis(server=server, decode_responses=decode_responses).connection_pool
+
+    redis.from_url = sync_client
+    redis.asyncio.BlockingConnectionPool.from_url = async_pool
+
+
+def _migrate(service: str, database_url: str):
+    from alembic import command
+    from alembic.config import Config
+
+    # Cada servicio lee DATABASE_URL al importar su ``config``
+    os.environ["DATABASE_URL"] = database_url
+    __import__(f"{service}.config")
+    command.upgrade(Config(os.path.join(ROOT, service, "alembic.ini")), "head")
+
+
+def prepare(
+    workdir: str,
+    posts_database_url: Optional[str] = None,
+    users_database_url: Optional[str] = None
+) -> dict:
+    """Configura Redis y las bases de datos; devuelve las URLs usadas"""
+    if any(name.split(".")[0] in ("posts", "users") for name in sys.modules):
+        raise RuntimeError("prepare() debe llamarse antes de importar posts o users")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    os.makedirs(workdir, exist_ok=True)
+    urls = {
+        "users": users_database_url or f"sqlite:///{os.path.join(workdir, 'users.db')}",
+        "posts": posts_database_url or f"sqlite:///{os.path.join(workdir, 'posts.db')}",
+    }
+    for service, url in urls.items():
+        if url.startswith("sqlite:///"):
+            path = url[len("sqlite:///"):]
+            if os.path.exists(path):
+                os.remove(path)  # Cada ejecución parte de una base de datos vacía
+
+    _patch_redis()
+    _migrate("users", urls["users"])
+    _migrate("posts", urls["posts"])
+    return urls
@@ -0,0 +1,209 @@
+"""Benchmark de carga de los servicios de posts y usuarios sin infraestructura.
+
+Siembra datos sintéticos (``benchmarks.seed``), lanza cada escenario
+(``benchmarks.scenarios``) con ``--concurrency`` workers hasta completar
+``--requests`` peticiones y escribe un informe JSON con p50/p95/p99,
+media y throughput por escenario. Con ``--baseline`` compara el informe
+con otro anterior y termina con código 1 si algún escenario empeora más de
+``--tolerance`` (p95 más alto o throughput más bajo) o tiene más errores.
+
+Por defecto usa SQLite en ``--workdir`` y fakeredis; con
+``--posts-database-url``/``--users-database-url`` se mide contra un
+PostgreSQL local (bases de datos vacías: se migran y se siembran).
+
+Uso:
+    python -m benchmarks.load [--users 200] [--posts-per-user 10] [--requests 300]
+        [--concurrency 10] [--scenarios feed-offset,search] [--output results.json]
+        [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks import environment
+
+# Los mismos que ``scenarios.SCENARIOS``, que no se puede importar antes de ``prepare``
+SCENARIO_NAMES = [
+    "feed-offset", "feed-cursor", "search", "post-detail", "like-toggle", "login", "validate-token",
+]
+# Métricas comparadas con la línea base: (métrica, True si más alto es peor)
+COMPARED_METRICS = [("p95_ms", True), ("throughput_rps", False)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Percentiles en milisegundos y peticiones por segundo"""
+    millis = sorted(latency * 1000 for latency in latencies)
+    if len(millis) > 1:
+        cuts = statistics.quantiles(millis, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = millis[0] if millis else 0.0
+    return {
+        "requests": len(millis),
+        "errors": errors,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(statistics.fmean(millis), 3) if millis else 0.0,
+        "max_ms": round(millis[-1], 3) if millis else 0.0,
+        "throughput_rps": round(len(millis) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def run_scenario(context, scenario, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+    from benchmarks.scenarios import Worker
+
+    warm_worker = Worker(random.Random(seed))
+    for _ in range(warmup):
+        await scenario(context, warm_worker)
+
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(range(requests))  # Compartido: cada worker toma la siguiente petición
+
+    async def work(index: int):
+        nonlocal errors
+        worker = Worker(random.Random(seed * 1000 + index))
+        for _ in pending:
+            start = time.perf_counter()
+            response = await scenario(context, worker)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(work(index) for index in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Imprime la comparación y devuelve las regresiones"""
+    regressions = []
+    if report["meta"]["dataset"] != baseline.get("meta", {}).get("dataset"):
+        print("Aviso: la línea base se midió con otro conjunto de datos")
+
+    print(f"\nComparación con la línea base (tolerancia {tolerance:.0%})")
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            print(f"  {name:<15} sin línea base")
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS:
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            mark = "REGRESIÓN" if worse else ""
+            print(f"  {name:<15} {metric:<15} {before:10.2f} -> {after:10.2f} ({change:+.1%}) {mark}")
+            if worse:
+                regressions.append(f"{name} {metric} {before} -> {after}")
+        if current["errors"] > previous["errors"]:
+            print(f"  {name:<15} errores {previous['errors']} -> {current['errors']} REGRESIÓN")
+            regressions.append(f"{name} errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+async def run(args, database_urls: Dict[str, str]) -> dict:
+    # Solo se pueden importar una vez preparado el entorno
+    from benchmarks.scenarios import SCENARIOS, open_context
+    from benchmarks.seed import generate
+
+    started = time.perf_counter()
+    dataset = await generate(
+        args.users, args.posts_per_user, args.comments_per_post, args.likes_per_post, args.seed
+    )
+    print(f"Datos sembrados en {time.perf_counter() - started:.1f} s: {dataset.summary()}")
+
+    context = await open_context(dataset, min(args.token_pool, len(dataset.users)))
+    results = {}
+    try:
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                context, SCENARIOS[name], args.requests, args.concurrency, args.warmup, args.seed
+            )
+            result = results[name]
+            print(
+                f"  {name:<15} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s  "
+                f"errores {result['errors']}"
+            )
+    finally:
+        await context.aclose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "databases": {
+                service: url.split(":", 1)[0] for service, url in database_urls.items()
+            },
+            "dataset": {
+                "seed": args.seed,
+                "users": args.users,
+                "posts_per_user": args.posts_per_user,
+                "comments_per_post": args.comments_per_post,
+                "likes_per_post": args.likes_per_post,
+            },
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "scenarios": results,
+    }
+
+
+def parse_scenarios(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIO_NAMES))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"escenarios desconocidos: {', '.join(unknown)}")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga local de posts y usuarios")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts-per-user", type=int, default=10)
+    parser.add_argument("--comments-per-post", type=int, default=3)
+    parser.add_argument("--likes-per-post", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=300, help="peticiones medidas por escenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="peticiones sin medir por escenario")
+    parser.add_argument("--token-pool", type=int, default=20, help="tokens reales para validate-token")
+    parser.add_argument("--scenarios", type=parse_scenarios, default=SCENARIO_NAMES)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="informe anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento tolerado (0.2 = 20%%)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "posts-users-bench"))
+    parser.add_argument("--posts-database-url")
+    parser.add_argument("--users-database-url")
+    args = parser.parse_args()
+
+    database_urls = environment.prepare(
+        args.workdir, args.posts_database_url, args.users_database_url
+    )
+    report = asyncio.run(run(args, database_urls))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Informe guardado en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
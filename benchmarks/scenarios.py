@@ -0,0 +1,152 @@
+"""Escenarios de carga contra las aplicaciones ASGI en el mismo proceso.
+
+Cada escenario hace una petición y devuelve la respuesta; el runner mide
+la latencia y cuenta como error cualquier estado >= 400. Las peticiones
+pasan por toda la pila de FastAPI (middlewares incluidos) sin red ni
+``lifespan``, así que las tareas periódicas no compiten con la carga.
+
+En los escenarios de posts el servicio de usuarios se sustituye por un
+stub en proceso que responde a ``/validate-token`` con los usuarios
+sembrados: el token de cada uno es ``bench-<id>``. Los escenarios de
+usuarios (login y validate-token) sí usan la aplicación real.
+"""
+import json
+import random
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.seed import PASSWORD, Dataset
+from posts import auth_service
+from posts.config import settings as posts_settings
+from posts.main import app as posts_app
+from users.main import app as users_app
+
+PAGE_SIZE = 20
+
+
+class Context:
+    """Clientes y datos compartidos por todos los workers"""
+
+    def __init__(self, dataset: Dataset, posts: httpx.AsyncClient, users: httpx.AsyncClient):
+        self.dataset = dataset
+        self.posts = posts
+        self.users = users
+        self.access_tokens: List[str] = []
+
+    async def aclose(self):
+        await self.posts.aclose()
+        await self.users.aclose()
+        await auth_service.close_http_client()
+
+
+class Worker:
+    """Estado de un worker: su generador aleatorio y lo que arrastra entre peticiones"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.state: Dict[str, object] = {}
+
+
+def stub_token(user: dict) -> str:
+    return f"bench-{user['id']}"
+
+
+def auth_stub(dataset: Dataset) -> httpx.MockTransport:
+    """Servicio de usuarios falso para el cliente HTTP de posts"""
+    users = {stub_token(user): user for user in dataset.users}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/validate-token":
+            return httpx.Response(404)
+        user = users.get(json.loads(request.content)["token"])
+        if user is None:
+            return httpx.Response(200, json={"valid": False, "message": "Invalid token"})
+        return httpx.Response(200, json={
+            "valid": True,
+            "user_id": user["id"],
+            "email": user["email"],
+            "username": user["username"],
+        })
+
+    return httpx.MockTransport(handle)
+
+
+async def open_context(dataset: Dataset, token_pool: int) -> Context:
+    auth_service._http_client = httpx.AsyncClient(
+        base_url=posts_settings.AUTH_SERVICE_URL, transport=auth_stub(dataset)
+    )
+    context = Context(
+        dataset,
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=posts_app), base_url="http://posts"),
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=users_app), base_url="http://users"),
+    )
+
+    # Tokens reales para validate-token, emitidos por el propio servicio
+    for user in dataset.users[:token_pool]:
+        response = await context.users.post(
+            "/login", json={"email": user["email"], "password": PASSWORD}
+        )
+        response.raise_for_status()
+        context.access_tokens.append(response.json()["access_token"])
+    return context
+
+
+async def feed_offset(context: Context, worker: Worker) -> httpx.Response:
+    """Primeras páginas del feed (las que más se piden y las que se cachean)"""
+    return await context.posts.get(
+        "/posts", params={"page": worker.rng.randint(1, 5), "size": PAGE_SIZE}
+    )
+
+
+async def feed_cursor(context: Context, worker: Worker) -> httpx.Response:
+    """Recorrido del feed página a página con cursor; vuelve al principio al acabar"""
+    params = {"pagination": "cursor", "size": PAGE_SIZE}
+    if worker.state.get("cursor"):
+        params["cursor"] = worker.state["cursor"]
+    response = await context.posts.get("/posts", params=params)
+    if response.status_code == 200:
+        worker.state["cursor"] = response.json()["next_cursor"]
+    return response
+
+
+async def search(context: Context, worker: Worker) -> httpx.Response:
+    return await context.posts.get(
+        "/posts", params={"search": worker.rng.choice(context.dataset.words), "size": PAGE_SIZE}
+    )
+
+
+async def post_detail(context: Context, worker: Worker) -> httpx.Response:
+    post_id = worker.rng.choice(context.dataset.published_ids)
+    return await context.posts.get(f"/posts/{post_id}")
+
+
+async def like_toggle(context: Context, worker: Worker) -> httpx.Response:
+    user = worker.rng.choice(context.dataset.users)
+    post_id = worker.rng.choice(context.dataset.published_ids)
+    return await context.posts.post(
+        f"/posts/{post_id}/like", headers={"Authorization": f"Bearer {stub_token(user)}"}
+    )
+
+
+async def login(context: Context, worker: Worker) -> httpx.Response:
+    user = worker.rng.choice(context.dataset.users)
+    return await context.users.post("/login", json={"email": user["email"], "password": PASSWORD})
+
+
+async def validate_token(context: Context, worker: Worker) -> httpx.Response:
+    token = worker.rng.choice(context.access_tokens)
+    return await context.users.post("/validate-token", json={"token": token})
+
+
+Scenario = Callable[[Context, Worker], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "feed-offset": feed_offset,
+    "feed-cursor": feed_cursor,
+    "search": search,
+    "post-detail": post_detail,
+    "like-toggle": like_toggle,
+    "login": login,
+    "validate-token": validate_token,
+}
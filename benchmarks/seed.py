@@ -0,0 +1,175 @@
+"""Generador de datos sintéticos para los benchmarks de carga.
+
+Crea N usuarios (todos con la contraseña ``PASSWORD``), sus posts,
+comentarios y likes con una semilla fija, de modo que dos ejecuciones con
+los mismos parámetros trabajan sobre los mismos datos (salvo el sufijo
+aleatorio de los slugs). Las filas se insertan por lotes y después se
+completan las tablas derivadas (índice de búsqueda, estadísticas por autor
+y ranking de tendencias) como lo harían los comandos de mantenimiento.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import insert, select
+
+from posts.author_stats import AuthorStatsService
+from posts.database import AsyncSessionLocal
+from posts.models import Comment, Post, PostLike
+from posts.search import SearchService
+from posts.trending import TrendingService
+from posts.utils import truncate_text, unique_slug
+from users.auth import get_password_hash
+from users.database import SessionLocal
+from users.models import User
+
+PASSWORD = "benchmark-password"
+BATCH_SIZE = 1000
+MAX_AGE = 30 * 24 * 3600  # antigüedad máxima de los posts, en segundos
+
+WORDS = [
+    "api", "arquitectura", "base", "caché", "cliente", "cola", "consulta",
+    "contenedor", "datos", "despliegue", "docker", "evento", "fastapi",
+    "frontend", "índice", "latencia", "microservicio", "migración", "modelo",
+    "monitorización", "paginación", "postgres", "python", "react", "redis",
+    "rendimiento", "seguridad", "servicio", "sesión", "token", "transacción",
+    "usuario",
+]
+
+
+class Dataset:
+    """Lo que necesitan los escenarios de los datos generados"""
+
+    def __init__(self, users: List[dict], post_ids: List[int], published_ids: List[int]):
+        self.users = users
+        self.post_ids = post_ids
+        self.published_ids = published_ids
+        self.words = WORDS
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "users": len(self.users),
+            "posts": len(self.post_ids),
+            "published_posts": len(self.published_ids),
+        }
+
+
+def _batches(rows: List[dict]):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_users(count: int) -> List[dict]:
+    # bcrypt es lento a propósito: un solo hash para todos los usuarios
+    hashed_password = get_password_hash(PASSWORD)
+    rows = [
+        {
+            "email": f"user{index}@bench.example.com",
+            "username": f"user{index}",
+            "first_name": "Bench",
+            "last_name": f"User {index}",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_verified": True,
+        }
+        for index in range(1, count + 1)
+    ]
+    with SessionLocal() as db:
+        for batch in _batches(rows):
+            db.execute(insert(User.__table__), batch)
+        db.commit()
+        users = db.execute(
+            select(User.id, User.email, User.username)
+            .where(User.email.like("%@bench.example.com"))
+            .order_by(User.id)
+        ).all()
+    return [user._asdict() for user in users]
+
+
+async def seed_posts(
+    users: List[dict],
+    posts_per_user: int,
+    comments_per_post: int,
+    likes_per_post: int,
+    rng: random.Random
+) -> Dataset:
+    now = datetime.now(timezone.utc)
+    post_rows, published = [], []
+    for user in users:
+        for _ in range(posts_per_user):
+            title = _text(rng, 5).capitalize()
+            content = _text(rng, 80)
+            is_published = rng.random() < 0.9
+            post_rows.append({
+                "title": title,
+                "content": content,
+                "summary": truncate_text(content),
+                "author_id": user["id"],
+                "author_email": user["email"],
+                "author_username": user["username"],
+                "slug": unique_slug(title),
+                "is_published": is_published,
+                "is_featured": rng.random() < 0.1,
+                "view_count": rng.randint(0, 500),
+                "comments_count": rng.randint(0, comments_per_post * 2),
+                "created_at": now - timedelta(seconds=rng.randint(0, MAX_AGE)),
+            })
+            published.append(is_published)
+
+    async with AsyncSessionLocal() as db:
+        post_ids = []
+        for batch in _batches(post_rows):
+            ids = (await db.scalars(
+                insert(Post.__table__).returning(Post.__table__.c.id, sort_by_parameter_order=True),
+                batch
+            )).all()
+            await SearchService.index_posts(db, [
+                {"post_id": post_id, "title": row["title"], "content": row["content"]}
+                for post_id, row in zip(ids, batch)
+            ])
+            post_ids.extend(ids)
+
+        comment_rows, like_rows = [], []
+        for post_id, row in zip(post_ids, post_rows):
+            for _ in range(row["comments_count"]):
+                author = rng.choice(users)
+                comment_rows.append({
+                    "content": _text(rng, 20),
+                    "post_id": post_id,
+                    "author_id": author["id"],
+                    "author_email": author["email"],
+                    "author_username": author["username"],
+                    "is_approved": True,
+                    "created_at": row["created_at"] + timedelta(seconds=rng.randint(1, 3600)),
+                })
+            likers = rng.sample(users, min(rng.randint(0, likes_per_post * 2), len(users)))
+            like_rows.extend({"post_id": post_id, "user_id": user["id"]} for user in likers)
+
+        for batch in _batches(comment_rows):
+            await db.execute(insert(Comment.__table__), batch)
+        for batch in _batches(like_rows):
+            await db.execute(insert(PostLike.__table__), batch)
+        await db.commit()
+
+        await AuthorStatsService.rebuild(db)
+        await TrendingService.rebuild(db)
+
+    published_ids = [post_id for post_id, is_published in zip(post_ids, published) if is_published]
+    return Dataset(users, post_ids, published_ids)
+
+
+async def generate(
+    users: int,
+    posts_per_user: int,
+    comments_per_post: int,
+    likes_per_post: int,
+    seed: int = 1
+) -> Dataset:
+    """Siembra ambas bases de datos; ``comments_per_post`` y ``likes_per_post`` son medias"""
+    rng = random.Random(seed)
+    seeded_users = seed_users(users)
+    return await seed_posts(seeded_users, posts_per_user, comments_per_post, likes_per_post, rng)
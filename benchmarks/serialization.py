@@ -0,0 +1,124 @@
+"""Micro-benchmark de la serialización de los listados de posts.
+
+Mide el coste por post de convertir una página de resultados en el cuerpo
+JSON de la respuesta con tres caminos:
+
+- ``from_orm``: ``PostListResponse.from_orm(post).dict()`` + ``PostListResponse(**dict)``
+  y validación de ``response_model`` por FastAPI (el camino original).
+- ``models``: un ``PostListResponse`` por fila + validación de ``response_model``.
+- ``rows``: filas de la consulta a dicts y orjson (el camino actual).
+
+Uso:
+    python -m benchmarks.serialization [--items 20] [--rounds 2000]
+"""
+import argparse
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Union
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from posts.main import FastJSONResponse, to_list_items
+from posts.schemas import (
+    CursorPaginatedResponse, DEFAULT_POST_LIST_FIELDS, PaginatedResponse, PostListResponse
+)
+
+FIELDS = ["id", *(field for field in DEFAULT_POST_LIST_FIELDS if field != "id")]
+Row = namedtuple("Row", FIELDS)
+
+response_field = create_response_field(
+    "Response", Union[PaginatedResponse, CursorPaginatedResponse]
+)
+
+
+def make_rows(count: int) -> List[Row]:
+    now = datetime.now(timezone.utc)
+    return [
+        Row(
+            id=index,
+            title=f"Post de prueba {index}",
+            summary="Resumen del post " * 8,
+            author_id=index % 50,
+            author_username=f"autor{index % 50}",
+            slug=f"post-de-prueba-{index}",
+            is_published=True,
+            is_featured=index % 10 == 0,
+            view_count=index * 7,
+            created_at=now - timedelta(minutes=index),
+            comments_count=index % 13,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def page(items) -> dict:
+    return {"items": items, "total": 1000, "page": 1, "size": len(items), "pages": 50}
+
+
+async def render_validated(items: list) -> bytes:
+    # Lo que hace FastAPI con un ``response_model`` antes de ``JSONResponse``
+    content = await serialize_response(
+        field=response_field, response_content=PaginatedResponse(**page(items)), exclude_unset=True
+    )
+    return JSONResponse(content).body
+
+
+async def from_orm_path(rows: List[Row]) -> bytes:
+    items = []
+    for row in rows:
+        post_dict = PostListResponse.from_orm(row).dict()
+        post_dict["view_count"] += 1  # vistas pendientes
+        items.append(PostListResponse(**post_dict))
+    return await render_validated(items)
+
+
+async def models_path(rows: List[Row]) -> bytes:
+    items = [PostListResponse(**{field: getattr(row, field) for field in FIELDS}) for row in rows]
+    for item in items:
+        item.view_count += 1
+    return await render_validated(items)
+
+
+async def rows_path(rows: List[Row]) -> bytes:
+    items = to_list_items(rows, FIELDS)
+    for item in items:
+        item["view_count"] += 1
+    return FastJSONResponse(page(items)).body
+
+
+async def measure(path: Callable, rows: List[Row], rounds: int) -> float:
+    """Microsegundos por post"""
+    for _ in range(min(rounds, 100)):  # Calentamiento
+        await path(rows)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await path(rows)
+    return (time.perf_counter() - start) / (rounds * len(rows)) * 1e6
+
+
+async def run(items: int, rounds: int):
+    rows = make_rows(items)
+    results = {}
+    for name, path in (("from_orm", from_orm_path), ("models", models_path), ("rows", rows_path)):
+        results[name] = await measure(path, rows, rounds)
+
+    print(f"{items} posts por página, {rounds} rondas")
+    for name, micros in results.items():
+        speedup = results["from_orm"] / micros
+        print(f"  {name:<9} {micros:8.2f} µs/post  x{speedup:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste por post de la serialización de listados")
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
-import { getPost, addComment, toggleLike } from '../services/postService';
+import { getPost, getCommentsPage, addComment, toggleLike } from '../services/postService';
 import type { PostResponse } from '../types/post';
 import CommentForm from '../components/CommentForm';
 
 export default function PostView() {
     const { id } = useParams<{ id: string }>();
     const [post, setPost] = useState<PostResponse | null>(null);
+    const [loadingComments, setLoadingComments] = useState(false);
     const token = localStorage.getItem('token') ?? '';
 
     useEffect(() => {
@@ -23,6 +24,23 @@ export default function PostView() {
         }
     };
 
+    // El detalle trae solo la primera página de comentarios; el resto se pide con el cursor
+    const handleLoadMore = async () => {
+        if (post?.comments_next_cursor && !loadingComments) {
+            setLoadingComments(true);
+            try {
+                const page = await getCommentsPage(post.id, post.comments_next_cursor);
+                setPost(current => current && {
+                    ...current,
+                    comments: [...current.comments, ...page.items],
+                    comments_next_cursor: page.next_cursor,
+                });
+            } finally {
+                setLoadingComments(false);
+            }
+        }
+    };
+
     const handleLike = async () => {
         if (post && token) {
             const res = await toggleLike(post.id, token);
@@ -62,6 +80,16 @@ export default function PostView() {
                     </li>
                 ))}
             </ul>
+
+            {post.comments_next_cursor && (
+                <button
+                    onClick={handleLoadMore}
+                    disabled={loadingComments}
+                    className="mt-4 px-4 py-1 bg-gray-200 dark:bg-gray-700 rounded hover:bg-gray-300 dark:hover:bg-gray-600 disabled:opacity-50"
+                >
+                    {loadingComments ? 'Cargando...' : 'Cargar más comentarios'}
+                </button>
+            )}
         </div>
     );
 }
@@ -2,7 +2,7 @@ import axios from 'axios';
 import type {
   PostResponse,
   PaginatedResponse,
-  CommentResponse,
+  CommentCursorPage,
   CommentCreate,
   PostCreate,
   PostUpdate,
@@ -11,6 +11,12 @@ import type {
 
 const API = 'http://localhost:8001';
 
+// Campos del listado de "mis posts" (content incluido para el formulario de edición)
+const MY_POSTS_FIELDS = [
+  'id', 'title', 'summary', 'content', 'slug', 'author_id', 'author_username',
+  'is_published', 'is_featured', 'view_count', 'created_at', 'comments_count',
+].join(',');
+
 // Función existente para obtener posts públicos
 export const getPosts = async (
   page = 1,
@@ -29,6 +35,7 @@ export const getMyPosts = async (
 ): Promise<PaginatedResponse> => {
   const res = await axios.get(`${API}/my-posts?page=${page}&size=${size}&published_only=${publishedOnly}`, {
     headers: { Authorization: `Bearer ${token}` },
+    params: { fields: MY_POSTS_FIELDS },
   });
   console.warn({ res });
 
@@ -37,13 +44,17 @@ export const getMyPosts = async (
 
 // Función existente para obtener un post específico
 export const getPost = async (id: number): Promise<PostResponse> => {
-  const res = await axios.get(`${API}/posts/${id}`);
+  const res = await axios.get(`${API}/posts/${id}`, {
+    params: { include: "comments" },
+  });
   return res.data;
 };
 
 // Función para obtener post por slug
 export const getPostBySlug = async (slug: string): Promise<PostResponse> => {
-  const res = await axios.get(`${API}/posts/slug/${slug}`);
+  const res = await axios.get(`${API}/posts/slug/${slug}`, {
+    params: { include: "comments" },
+  });
   return res.data;
 };
 
@@ -88,11 +99,26 @@ export const getMyStats = async (token: string): Promise<PostStats> => {
   return res.data;
 };
 
-// Función existente para obtener comentarios
+// Primera página de comentarios (la API pagina con cursor por defecto)
 export const getComments = async (
-  postId: number
-): Promise<CommentResponse[]> => {
-  const res = await axios.get(`${API}/posts/${postId}/comments`);
+  postId: number,
+  size = 10
+): Promise<CommentCursorPage> => {
+  const res = await axios.get(`${API}/posts/${postId}/comments`, {
+    params: { size },
+  });
+  return res.data;
+};
+
+// Siguiente página de comentarios a partir del cursor de la anterior
+export const getCommentsPage = async (
+  postId: number,
+  cursor: string,
+  size = 10
+): Promise<CommentCursorPage> => {
+  const res = await axios.get(`${API}/posts/${postId}/comments`, {
+    params: { cursor, size },
+  });
   return res.data;
 };
 
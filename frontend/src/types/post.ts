@@ -26,6 +26,7 @@ export interface PostResponse {
     updated_at?: string;
     likes_count: number
     comments: CommentResponse[];
+    comments_next_cursor?: string | null;
 }
 
 export interface CommentCreate {
@@ -122,6 +123,13 @@ export interface PaginatedResponse {
     pages: number;
 }
 
+// Página de comentarios con cursor
+export interface CommentCursorPage {
+    items: CommentResponse[];
+    size: number;
+    next_cursor: string | null;
+}
+
 // Tipos para estadísticas
 export interface PostStats {
     total_posts: number;
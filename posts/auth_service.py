@@ -1,46 +1,263 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 import httpx
+from redis.exceptions import RedisError
 from fastapi import HTTPException, status
 from posts.config import settings
+from posts.local_auth import LocalTokenVerifier, revoked_tokens
+from posts.redis_client import redis_client
 from posts.schemas import AuthUser
 
+logger = logging.getLogger(__name__)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expiration(token: str) -> Optional[float]:
+    """Lee el ``exp`` del JWT sin verificar la firma (la verifica el servicio de usuarios)"""
+    try:
+        payload_segment = token.split(".")[1]
+        padded = payload_segment + "=" * (-len(payload_segment) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(padded)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenCache:
+    """Caché LRU con TTL de tokens ya validados, indexada por el hash del token"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, AuthUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token_hash: str) -> Optional[AuthUser]:
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return user
+    
+    def set(self, token_hash: str, user: AuthUser, token_exp: Optional[float] = None):
+        # La entrada nunca sobrevive al exp del token
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[token_hash] = (expires_at, user)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def evict(self, token_hash: str):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL)
+
+
+def _handle_revocation(message: dict):
+    try:
+        data = json.loads(message["data"])
+        token_hash, expires_at = data["token_hash"], float(data["expires_at"])
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Malformed revocation message: %r", message.get("data"))
+        return
+    token_cache.evict(token_hash)
+    revoked_tokens.add(token_hash, expires_at)
+
+
+async def listen_for_revocations():
+    """Escucha las revocaciones publicadas por el servicio de usuarios"""
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(settings.AUTH_REVOCATION_CHANNEL)
+            # Réplica inicial tras (re)conectar para no perder revocaciones
+            if settings.AUTH_LOCAL_VERIFICATION:
+                await revoked_tokens.load_from_redis(hash_token)
+            async for message in pubsub.listen():
+                _handle_revocation(message)
+        except RedisError:
+            logger.warning("Revocation listener disconnected, retrying")
+            await asyncio.sleep(1.0)
+        finally:
+            await pubsub.aclose()
+
+class CircuitBreaker:
+    """Corta las llamadas a un servicio degradado durante ``reset_timeout`` segundos"""
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+    
+    def allow_request(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        # Semiabierto: se deja pasar una única petición de prueba
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+auth_breaker = CircuitBreaker(
+    settings.AUTH_BREAKER_FAILURE_THRESHOLD, settings.AUTH_BREAKER_RESET_TIMEOUT
+)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Validaciones en curso por hash de token
+_inflight: Dict[str, "asyncio.Task[AuthUser]"] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartido con keep-alive hacia el servicio de usuarios"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=settings.AUTH_SERVICE_URL,
+            timeout=settings.AUTH_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.AUTH_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AUTH_HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 class AuthService:
     @staticmethod
     async def validate_token(token: str) -> AuthUser:
         """Valida el token con el servicio de autenticación"""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{settings.AUTH_SERVICE_URL}/validate-token",
-                    json={"token": token},
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid token"
-                    )
-                
-                data = response.json()
-                if not data.get("valid"):
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail=data.get("message", "Invalid token")
-                    )
-                
-                return AuthUser(
-                    user_id=data["user_id"],
-                    email=data["email"],
-                    username=data["username"]
-                )
-                
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Auth service unavailable"
-                )
-            except httpx.RequestError:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Auth service connection error"
-                )
+        token_hash = hash_token(token)
+        cached_user = token_cache.get(token_hash)
+        if cached_user is not None:
+            return cached_user
+        
+        # Modo local: firma y exp verificados sin llamar al servicio de usuarios
+        if settings.AUTH_LOCAL_VERIFICATION:
+            user = await LocalTokenVerifier.verify(token, token_hash, get_http_client())
+            if user is not None:
+                return user
+        
+        # Peticiones concurrentes con el mismo token comparten una sola llamada
+        task = _inflight.get(token_hash)
+        if task is None:
+            task = asyncio.ensure_future(AuthService._validate_and_cache(token, token_hash))
+            _inflight[token_hash] = task
+            task.add_done_callback(lambda _: _inflight.pop(token_hash, None))
+        
+        return await asyncio.shield(task)
+    
+    @staticmethod
+    async def _validate_and_cache(token: str, token_hash: str) -> AuthUser:
+        user = await AuthService._validate_remote(token)
+        # Una revocación llegada durante la validación no debe quedar en caché
+        if revoked_tokens.contains(token_hash):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        token_cache.set(token_hash, user, token_expiration(token))
+        return user
+    
+    @staticmethod
+    async def _validate_remote(token: str) -> AuthUser:
+        if not auth_breaker.allow_request():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Auth service unavailable"
+            )
+        
+        try:
+            response = await get_http_client().post(
+                "/validate-token",
+                json={"token": token}
+            )
+        except httpx.TimeoutException:
+            auth_breaker.record_failure()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Auth service unavailable"
+            )
+        except httpx.RequestError:
+            auth_breaker.record_failure()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Auth service connection error"
+            )
+        
+        if response.status_code >= 500:
+            auth_breaker.record_failure()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Auth service unavailable"
+            )
+        
+        auth_breaker.record_success()
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+        
+        data = response.json()
+        if not data.get("valid"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=data.get("message", "Invalid token")
+            )
+        
+        return AuthUser(
+            user_id=data["user_id"],
+            email=data["email"],
+            username=data["username"]
+        )
@@ -0,0 +1,108 @@
+"""Estadísticas por autor mantenidas de forma incremental.
+
+Cada escritura (posts, comentarios, likes y volcado de vistas) suma su
+delta a ``author_stats`` dentro de su propia transacción, así que
+``/my-stats`` y ``/my-likes-count`` leen una sola fila. El comando
+``rebuild-author-stats`` recalcula la tabla completa.
+"""
+from typing import Dict, List
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.database import insert_ignoring_conflicts
+from posts.models import AuthorStats, Post, PostLike
+
+STATS_FIELDS = (
+    "total_posts",
+    "published_posts",
+    "draft_posts",
+    "featured_posts",
+    "total_views",
+    "total_likes",
+    "total_comments",
+)
+
+stats_table = AuthorStats.__table__
+posts_table = Post.__table__
+
+# Autor del post indicado en cada fila (vacío si el post ya no existe)
+post_author = (
+    select(posts_table.c.author_id)
+    .where(posts_table.c.id == bindparam("post_id"))
+    .scalar_subquery()
+)
+
+
+def _adjust_by_post_statement(field: str):
+    return (
+        update(stats_table)
+        .where(stats_table.c.author_id == post_author)
+        .values({field: stats_table.c[field] + bindparam("delta")})
+    )
+
+
+class AuthorStatsService:
+    @staticmethod
+    def post_deltas(post: Post, sign: int = 1) -> Dict[str, int]:
+        """Contribución de un post a los contadores de su autor"""
+        return {
+            "total_posts": sign,
+            "published_posts": sign if post.is_published else 0,
+            "draft_posts": 0 if post.is_published else sign,
+            "featured_posts": sign if post.is_featured else 0,
+        }
+
+    @staticmethod
+    async def adjust(db: AsyncSession, author_id: int, deltas: Dict[str, int]):
+        """Suma ``deltas`` a las estadísticas del autor (sin hacer commit)"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        await db.execute(
+            insert_ignoring_conflicts(db.bind.dialect.name, stats_table, ["author_id"]),
+            {"author_id": author_id}
+        )
+        await db.execute(
+            update(stats_table)
+            .where(stats_table.c.author_id == author_id)
+            .values({field: stats_table.c[field] + delta for field, delta in deltas.items()})
+        )
+
+    @staticmethod
+    async def adjust_by_post(db: AsyncSession, field: str, rows: List[dict]):
+        """Suma deltas por post (``{"post_id", "delta"}``) al autor de cada post"""
+        if rows:
+            await db.execute(_adjust_by_post_statement(field), rows)
+
+    @staticmethod
+    async def get_stats(db: AsyncSession, author_id: int) -> Dict[str, int]:
+        stats = await db.get(AuthorStats, author_id)
+        return {field: getattr(stats, field, 0) or 0 for field in STATS_FIELDS}
+
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> int:
+        """Recalcula las estadísticas de todos los autores"""
+        await db.execute(delete(stats_table))
+        await db.execute(stats_table.insert().from_select(
+            ["author_id", "total_posts", "published_posts", "draft_posts",
+             "featured_posts", "total_views", "total_likes", "total_comments"],
+            select(
+                Post.author_id,
+                func.count(Post.id),
+                func.sum(case((Post.is_published == True, 1), else_=0)),
+                func.sum(case((Post.is_published == False, 1), else_=0)),
+                func.sum(case((Post.is_featured == True, 1), else_=0)),
+                func.coalesce(func.sum(Post.view_count), 0),
+                0,
+                func.coalesce(func.sum(Post.comments_count), 0),
+            ).group_by(Post.author_id)
+        ))
+
+        likes_per_author = (
+            select(func.count(PostLike.id))
+            .join(Post, Post.id == PostLike.post_id)
+            .where(Post.author_id == stats_table.c.author_id)
+            .scalar_subquery()
+        )
+        await db.execute(update(stats_table).values(total_likes=likes_per_author))
+        await db.commit()
+        return await db.scalar(select(func.count()).select_from(stats_table))
@@ -0,0 +1,90 @@
+"""Comandos de mantenimiento del microservicio de posts.
+
+Uso:
+    python -m posts.commands reconcile-comments
+    python -m posts.commands rebuild-search-index
+    python -m posts.commands reconcile-likes
+    python -m posts.commands rebuild-author-stats
+    python -m posts.commands check-query-plans
+    python -m posts.commands rebuild-trending
+"""
+import argparse
+import asyncio
+import sys
+
+from posts.author_stats import AuthorStatsService
+from posts.database import AsyncSessionLocal
+from posts.like_store import LikeStore
+from posts.query_plans import QueryPlanService
+from posts.services import CommentService
+from posts.search import SearchService
+from posts.tasks import refresh_trending
+
+
+async def reconcile_comments():
+    """Recalcula el contador desnormalizado de comentarios"""
+    async with AsyncSessionLocal() as db:
+        updated = await CommentService.reconcile_comments_count(db)
+    print(f"Contadores de comentarios recalculados: {updated} posts")
+
+
+async def rebuild_search_index():
+    """Reconstruye el índice de búsqueda de texto completo"""
+    async with AsyncSessionLocal() as db:
+        indexed = await SearchService.rebuild_index(db)
+    print(f"Índice de búsqueda reconstruido: {indexed} posts")
+
+
+async def reconcile_likes():
+    """Vuelca a la base de datos los likes pendientes en Redis"""
+    applied = await LikeStore.flush()
+    print(f"Cambios de likes aplicados: {applied}")
+
+
+
+async def rebuild_author_stats():
+    """Recalcula las estadísticas por autor (backfill)"""
+    # Los likes pendientes en Redis se vuelcan antes de contar
+    await LikeStore.flush()
+    async with AsyncSessionLocal() as db:
+        authors = await AuthorStatsService.rebuild(db)
+    print(f"Estadísticas recalculadas: {authors} autores")
+
+
+
+async def check_query_plans():
+    """Falla si alguna consulta caliente recorre una tabla entera"""
+    async with AsyncSessionLocal() as db:
+        failures = await QueryPlanService.check(db)
+    for failure in failures:
+        print(f"Recorrido secuencial en {failure}")
+    if failures:
+        sys.exit(1)
+    print("Todas las consultas usan índices")
+
+
+async def rebuild_trending():
+    """Recalcula el ranking de tendencias desde la base de datos"""
+    ranked = await refresh_trending()
+    print(f"Ranking de tendencias reconstruido: {ranked} posts")
+
+
+COMMANDS = {
+    "reconcile-comments": reconcile_comments,
+    "rebuild-search-index": rebuild_search_index,
+    "reconcile-likes": reconcile_likes,
+    "rebuild-author-stats": rebuild_author_stats,
+    "check-query-plans": check_query_plans,
+    "rebuild-trending": rebuild_trending,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento de posts")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""GET condicionales (ETag / Last-Modified) para la API de lectura.
+
+Los endpoints calientes calculan el ETag a partir de versiones guardadas en
+Redis (sin tocar la base de datos ni renderizar el cuerpo) y responden 304
+en cuanto coincide. Para el resto de respuestas JSON, ``ETagMiddleware``
+deriva un ETag débil del cuerpo ya generado, lo que al menos ahorra la
+transferencia.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Union
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+CACHE_CONTROL = "no-cache"  # El cliente guarda la respuesta pero revalida siempre
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_for_body(body: Union[bytes, str]) -> str:
+    if isinstance(body, str):
+        body = body.encode()
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def http_date(timestamp: float) -> str:
+    return format_datetime(datetime.fromtimestamp(timestamp, tz=timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str, exists: bool) -> bool:
+    # Comparación débil: se ignora el prefijo W/
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return (exists and "*" in candidates) or etag.removeprefix("W/") in candidates
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[float] = None, exists: bool = True
+) -> bool:
+    """``exists=False`` cuando aún no se sabe si el recurso existe: ``*`` no coincide"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tiene prioridad sobre If-Modified-Since
+        return _etag_matches(if_none_match, etag, exists)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[float] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[float] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: Optional[float] = None):
+    response.headers.update(cache_headers(etag, last_modified))
+
+
+class ETagMiddleware(BaseHTTPMiddleware):
+    """ETag a partir del cuerpo para las respuestas JSON que no traen uno propio"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or "etag" in response.headers
+            or not response.headers.get("content-type", "").startswith("application/json")
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = etag_for_body(body)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+        headers = dict(response.headers)
+        headers.update(cache_headers(etag))
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.media_type
+        )
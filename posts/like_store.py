@@ -0,0 +1,364 @@
+"""Likes con toggle atómico en Redis y escritura diferida a ``post_likes``.
+
+Cada post tiene un set ``post:likes:{id}`` con los ids de usuario que le han
+dado like (más un miembro centinela para distinguir "sin likes" de "no
+cargado"), así que el toggle, el conteo y la comprobación son O(1). Los
+cambios se anotan en el hash ``posts:likes:pending`` con el estado final de
+cada par post/usuario y un proceso en segundo plano los vuelca a la base de
+datos, donde la restricción única evita duplicados.
+
+Los sets solo se crean para posts que existen y caducan tras
+``LIKES_SET_TTL`` segundos sin accesos (cada lectura o toggle renueva el
+plazo); el siguiente acceso los recarga desde ``post_likes``. Si Redis no
+responde, el toggle se escribe directamente en la base de datos y el set de
+ese post se borra en cuanto Redis vuelve, para que se recargue.
+"""
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import bindparam, case, delete, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.author_stats import AuthorStatsService
+from posts.config import settings
+from posts.database import AsyncSessionLocal, insert_ignoring_conflicts
+from posts.models import Post, PostLike
+from posts.redis_client import redis_client
+from posts.trending import TrendingService, decayed
+
+# Hash de Redis con los cambios pendientes: {"post_id:user_id": "1" | "0"}
+PENDING_LIKES_KEY = "posts:likes:pending"
+
+# Miembro que marca el set como cargado aunque el post no tenga likes
+LOADED_MARKER = "*"
+
+# Devuelve {liked, likes_count, pending} o -1 si el set no está cargado;
+# ``pending`` es 1 si el par tenía un like aún sin volcar a la base de datos
+TOGGLE_LIKE_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 0 then
+    return -1
+end
+redis.call("expire", KEYS[1], ARGV[3])
+local liked = 1
+if redis.call("sismember", KEYS[1], ARGV[1]) == 1 then
+    redis.call("srem", KEYS[1], ARGV[1])
+    liked = 0
+else
+    redis.call("sadd", KEYS[1], ARGV[1])
+end
+local pending = redis.call("hget", KEYS[2], ARGV[2]) == "1" and 1 or 0
+redis.call("hset", KEYS[2], ARGV[2], liked)
+return {liked, redis.call("scard", KEYS[1]) - 1, pending}
+"""
+
+# Carga el set solo si nadie lo ha hecho antes (y no pisa toggles recientes)
+LOAD_LIKES_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 1 then
+    return 0
+end
+for i = 2, #ARGV, 5000 do
+    redis.call("sadd", KEYS[1], unpack(ARGV, i, math.min(i + 4999, #ARGV)))
+end
+redis.call("expire", KEYS[1], ARGV[1])
+return 1
+"""
+
+# Devuelve {likes_count, has_liked} o -1 si el set no está cargado
+READ_LIKES_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 0 then
+    return -1
+end
+redis.call("expire", KEYS[1], ARGV[2])
+return {redis.call("scard", KEYS[1]) - 1, redis.call("sismember", KEYS[1], ARGV[1])}
+"""
+
+likes_table = PostLike.__table__
+
+remove_likes = likes_table.delete().where(
+    likes_table.c.post_id == bindparam("b_post_id"),
+    likes_table.c.user_id == bindparam("b_user_id")
+)
+
+
+# Posts con toggles hechos en la base de datos mientras Redis no respondía
+_stale_sets: Set[int] = set()
+
+
+def _likes_key(post_id: int) -> str:
+    return f"post:likes:{post_id}"
+
+
+class LikeStore:
+    @staticmethod
+    def _queue_load(pipe, post_id: int, user_ids: Iterable[int]):
+        pipe.eval(
+            LOAD_LIKES_SCRIPT, 1, _likes_key(post_id),
+            settings.LIKES_SET_TTL, LOADED_MARKER, *user_ids
+        )
+
+    @staticmethod
+    async def _load(db: AsyncSession, post_id: int) -> bool:
+        """Carga el set desde la base de datos; False si el post no existe"""
+        if await db.scalar(select(Post.id).where(Post.id == post_id)) is None:
+            return False
+        user_ids = (await db.scalars(
+            select(PostLike.user_id).where(PostLike.post_id == post_id)
+        )).all()
+        pipe = redis_client.pipeline(transaction=False)
+        LikeStore._queue_load(pipe, post_id, user_ids)
+        await pipe.execute()
+        return True
+
+    @staticmethod
+    async def _drop_stale_sets():
+        """Borra los sets desfasados por toggles hechos sin Redis"""
+        if not _stale_sets:
+            return
+        post_ids = list(_stale_sets)
+        await redis_client.delete(*(_likes_key(post_id) for post_id in post_ids))
+        _stale_sets.difference_update(post_ids)
+
+    @staticmethod
+    async def _run(db: AsyncSession, post_id: int, script: str, keys: tuple, args: tuple):
+        """Resultado del script, o None si el post no existe"""
+        await LikeStore._drop_stale_sets()
+        # Si el set no está en Redis se carga desde la base de datos y se reintenta
+        for _ in range(2):
+            result = await redis_client.eval(script, len(keys), *keys, *args)
+            if result != -1:
+                return result
+            if not await LikeStore._load(db, post_id):
+                return None
+        raise RedisError(f"Likes of post {post_id} could not be loaded")
+
+    @staticmethod
+    async def toggle(db: AsyncSession, post_id: int, user_id: int) -> Tuple[bool, int]:
+        """Alterna el like del usuario; devuelve (liked, likes_count)"""
+        try:
+            result = await LikeStore._run(
+                db, post_id, TOGGLE_LIKE_SCRIPT,
+                (_likes_key(post_id), PENDING_LIKES_KEY),
+                (user_id, f"{post_id}:{user_id}", settings.LIKES_SET_TTL)
+            )
+        except RedisError:
+            # Sin Redis se alterna directamente en la base de datos
+            _stale_sets.add(post_id)
+            liked = await LikeStore._toggle_in_db(db, post_id, user_id)
+            return liked, await LikeStore._count_in_db(db, post_id)
+        if result is None:
+            return False, 0  # El post se borró entretanto
+        liked, likes_count, pending = result
+
+        weight = settings.TRENDING_LIKE_WEIGHT
+        if not liked and not pending:
+            # El like retirado ya estaba volcado: se resta lo que aún vale, no su peso original
+            created_at = await db.scalar(select(PostLike.created_at).where(
+                PostLike.post_id == post_id,
+                PostLike.user_id == user_id
+            ))
+            weight = decayed(weight, created_at, time.time())
+
+        pipe = redis_client.pipeline(transaction=False)
+        if liked:
+            TrendingService.record(post_id, weight, pipe)
+        else:
+            TrendingService.retract(post_id, weight, pipe)
+        try:
+            await pipe.execute()
+        except RedisError:
+            pass  # El ranking se corrige en la siguiente reconstrucción
+        return bool(liked), likes_count
+
+    @staticmethod
+    async def read(db: AsyncSession, post_id: int, user_id: int = 0) -> Tuple[int, bool]:
+        """Número de likes del post y si ``user_id`` le ha dado like"""
+        try:
+            result = await LikeStore._run(
+                db, post_id, READ_LIKES_SCRIPT,
+                (_likes_key(post_id),), (user_id, settings.LIKES_SET_TTL)
+            )
+        except RedisError:
+            likes_count = await LikeStore._count_in_db(db, post_id)
+            like_id = await db.scalar(select(PostLike.id).where(
+                PostLike.post_id == post_id,
+                PostLike.user_id == user_id
+            ).limit(1))
+            return likes_count, like_id is not None
+        if result is None:
+            return 0, False
+        likes_count, has_liked = result
+        return likes_count, bool(has_liked)
+
+    @staticmethod
+    async def read_many(
+        db: AsyncSession, post_ids: Iterable[int], user_id: int = 0
+    ) -> Dict[int, Tuple[int, bool]]:
+        """Likes y like del usuario para varios posts en un solo pipeline"""
+        post_ids = list(dict.fromkeys(post_ids))
+        if not post_ids:
+            return {}
+        try:
+            await LikeStore._drop_stale_sets()
+            result = await LikeStore._read_pipeline(post_ids, user_id)
+            missing = [post_id for post_id in post_ids if post_id not in result]
+            if missing:
+                # Los posts inexistentes no se cargan en Redis
+                existing = set((await db.scalars(
+                    select(Post.id).where(Post.id.in_(missing))
+                )).all())
+                result.update({post_id: (0, False) for post_id in missing if post_id not in existing})
+                missing = [post_id for post_id in missing if post_id in existing]
+            if missing:
+                # Una sola consulta para todos los sets que faltan en Redis
+                likers: Dict[int, List[int]] = defaultdict(list)
+                rows = await db.execute(
+                    select(PostLike.post_id, PostLike.user_id)
+                    .where(PostLike.post_id.in_(missing))
+                )
+                for post_id, liker_id in rows:
+                    likers[post_id].append(liker_id)
+                pipe = redis_client.pipeline(transaction=False)
+                for post_id in missing:
+                    LikeStore._queue_load(pipe, post_id, likers[post_id])
+                await pipe.execute()
+                result.update(await LikeStore._read_pipeline(missing, user_id))
+            return {post_id: result[post_id] for post_id in post_ids if post_id in result}
+        except RedisError:
+            return await LikeStore._read_many_in_db(db, post_ids, user_id)
+
+    @staticmethod
+    async def read_loaded(post_ids: Iterable[int]) -> Dict[int, int]:
+        """Likes de los posts cuyo set ya está en Redis (sin tocar la base de datos)"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        try:
+            result = await LikeStore._read_pipeline(post_ids, 0)
+        except RedisError:
+            return {}
+        return {post_id: likes_count for post_id, (likes_count, _) in result.items()}
+
+    @staticmethod
+    async def _read_pipeline(post_ids: List[int], user_id: int) -> Dict[int, Tuple[int, bool]]:
+        pipe = redis_client.pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.eval(READ_LIKES_SCRIPT, 1, _likes_key(post_id), user_id, settings.LIKES_SET_TTL)
+        return {
+            post_id: (value[0], bool(value[1]))
+            for post_id, value in zip(post_ids, await pipe.execute())
+            if value != -1
+        }
+
+    @staticmethod
+    async def _read_many_in_db(
+        db: AsyncSession, post_ids: List[int], user_id: int
+    ) -> Dict[int, Tuple[int, bool]]:
+        rows = await db.execute(
+            select(
+                PostLike.post_id,
+                func.count(PostLike.id),
+                func.max(case((PostLike.user_id == user_id, 1), else_=0))
+            )
+            .where(PostLike.post_id.in_(post_ids))
+            .group_by(PostLike.post_id)
+        )
+        result = {post_id: (0, False) for post_id in post_ids}
+        for post_id, likes_count, liked in rows:
+            result[post_id] = (likes_count, bool(liked))
+        return result
+
+    @staticmethod
+    async def _toggle_in_db(db: AsyncSession, post_id: int, user_id: int) -> bool:
+        result = await db.execute(
+            remove_likes, {"b_post_id": post_id, "b_user_id": user_id}
+        )
+        if result.rowcount:
+            await AuthorStatsService.adjust_by_post(
+                db, "total_likes", [{"post_id": post_id, "delta": -1}]
+            )
+            await db.commit()
+            return False
+        try:
+            db.add(PostLike(post_id=post_id, user_id=user_id))
+            await AuthorStatsService.adjust_by_post(
+                db, "total_likes", [{"post_id": post_id, "delta": 1}]
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()  # Otra petición lo insertó primero
+        return True
+
+    @staticmethod
+    async def _count_in_db(db: AsyncSession, post_id: int) -> int:
+        return await db.scalar(
+            select(func.count(PostLike.id)).where(PostLike.post_id == post_id)
+        )
+
+    @staticmethod
+    def forget(post_id: int, pipe):
+        """Encola el borrado del set de likes de un post eliminado"""
+        pipe.delete(_likes_key(post_id))
+
+    @staticmethod
+    async def flush() -> int:
+        """Vuelca los cambios pendientes a ``post_likes``"""
+        await LikeStore._drop_stale_sets()
+        batch_key = f"{PENDING_LIKES_KEY}:flush:{uuid.uuid4().hex}"
+        try:
+            await redis_client.rename(PENDING_LIKES_KEY, batch_key)
+        except ResponseError:
+            return 0  # No hay cambios pendientes
+
+        changes: Dict[str, str] = await redis_client.hgetall(batch_key)
+        likes, unlikes = [], []
+        for field, liked in changes.items():
+            post_id, user_id = (int(part) for part in field.split(":"))
+            (likes if liked == "1" else unlikes).append((post_id, user_id))
+
+        try:
+            async with AsyncSessionLocal() as db:
+                # RETURNING da las filas que cambiaron de verdad para las estadísticas
+                deltas = Counter()
+                if unlikes:
+                    removed = await db.scalars(
+                        delete(likes_table)
+                        .where(tuple_(likes_table.c.post_id, likes_table.c.user_id).in_(unlikes))
+                        .returning(likes_table.c.post_id)
+                    )
+                    deltas.subtract(removed.all())
+                if likes:
+                    # Los posts borrados entretanto no admiten likes
+                    existing = set((await db.scalars(select(Post.id).where(
+                        Post.id.in_({post_id for post_id, _ in likes})
+                    ))).all())
+                    rows = [
+                        {"post_id": post_id, "user_id": user_id}
+                        for post_id, user_id in likes if post_id in existing
+                    ]
+                    if rows:
+                        # La restricción única resuelve las carreras entre workers
+                        added = await db.scalars(
+                            insert_ignoring_conflicts(
+                                db.bind.dialect.name, likes_table, ["post_id", "user_id"]
+                            ).returning(likes_table.c.post_id),
+                            rows
+                        )
+                        deltas.update(added.all())
+                await AuthorStatsService.adjust_by_post(db, "total_likes", [
+                    {"post_id": post_id, "delta": delta}
+                    for post_id, delta in deltas.items() if delta
+                ])
+                await db.commit()
+        except Exception:
+            # Devolver los cambios sin pisar toggles más recientes
+            pipe = redis_client.pipeline(transaction=False)
+            for field, liked in changes.items():
+                pipe.hsetnx(PENDING_LIKES_KEY, field, liked)
+            pipe.delete(batch_key)
+            await pipe.execute()
+            raise
+
+        await redis_client.delete(batch_key)
+        return len(changes)
@@ -0,0 +1,148 @@
+"""Verificación local de tokens JWT (modo opcional ``AUTH_LOCAL_VERIFICATION``).
+
+Las claves públicas se obtienen del JWKS del servicio de usuarios y se
+cachean; un ``kid`` desconocido fuerza una recarga para soportar la rotación.
+Las revocaciones (``blacklist:*``) se replican en memoria a partir de Redis
+al arrancar y se mantienen al día con los avisos de pub/sub.
+"""
+import threading
+import time
+from typing import Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from posts.config import settings
+from posts.redis_client import redis_client
+from posts.schemas import AuthUser
+
+
+class RevocationStore:
+    """Hashes de tokens revocados con su instante de expiración"""
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, token_hash: str, expires_at: float):
+        with self._lock:
+            self._revoked[token_hash] = expires_at
+
+    def contains(self, token_hash: str) -> bool:
+        with self._lock:
+            expires_at = self._revoked.get(token_hash)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._revoked[token_hash]
+                return False
+            return True
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for token_hash in [h for h, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[token_hash]
+
+    async def load_from_redis(self, hash_token, batch_size: int = 500):
+        """Réplica inicial de las claves ``blacklist:*``"""
+        keys = []
+        async for key in redis_client.scan_iter(match="blacklist:*", count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                await self._load_batch(keys, hash_token)
+                keys = []
+        if keys:
+            await self._load_batch(keys, hash_token)
+
+    async def _load_batch(self, keys, hash_token):
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+        now = time.time()
+        for key, ttl in zip(keys, await pipe.execute()):
+            if ttl and ttl > 0:
+                self.add(hash_token(key[len("blacklist:"):]), now + ttl)
+
+
+revoked_tokens = RevocationStore()
+
+
+class JWKSCache:
+    """Claves públicas del servicio de usuarios por ``kid``"""
+
+    def __init__(self, ttl: float, min_refresh_interval: float):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+
+    async def get_key(self, client: httpx.AsyncClient, kid: Optional[str]) -> Optional[dict]:
+        age = time.monotonic() - self._fetched_at
+        if age > self.ttl or (kid not in self._keys and age > self.min_refresh_interval):
+            await self.refresh(client)
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return self._keys.get(kid)
+
+    async def refresh(self, client: httpx.AsyncClient):
+        self._fetched_at = time.monotonic()
+        try:
+            response = await client.get("/.well-known/jwks.json")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return  # Se conservan las claves anteriores
+        self._keys = {key["kid"]: key for key in response.json().get("keys", [])}
+
+
+jwks_cache = JWKSCache(settings.AUTH_JWKS_CACHE_TTL, settings.AUTH_JWKS_MIN_REFRESH_INTERVAL)
+
+
+class LocalTokenVerifier:
+    @staticmethod
+    async def verify(token: str, token_hash: str, client: httpx.AsyncClient) -> Optional[AuthUser]:
+        """Verifica firma y ``exp`` localmente.
+
+        Devuelve ``None`` si el token no se puede resolver sin el servicio de
+        usuarios (sin claves publicadas o sin los claims de usuario).
+        """
+        if revoked_tokens.contains(token_hash):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+
+        key = await jwks_cache.get_key(client, header.get("kid"))
+        if key is None:
+            return None
+
+        try:
+            payload = jwt.decode(token, key, algorithms=[key.get("alg", "RS256")])
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+
+        if payload.get("type") != "access":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token type"
+            )
+
+        # Tokens emitidos antes de incluir los claims de usuario
+        if payload.get("uid") is None or payload.get("username") is None or payload.get("sub") is None:
+            return None
+
+        return AuthUser(
+            user_id=payload["uid"],
+            email=payload["sub"],
+            username=payload["username"]
+        )
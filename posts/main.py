@@ -1,23 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Union
 import math
+import hashlib
+import orjson
 
 from posts.config import settings
-from posts.database import get_db, engine
-from posts.models import Base, Post, Comment
+from posts.database import get_async_db, AsyncSessionLocal
 from posts.schemas import *
 from posts.services import PostService, CommentService, LikeService
-from posts.auth_service import AuthService
-from posts.redis_client import RedisService
+from posts.view_counter import ViewCounterService
+from posts.post_import import PostImportService
+from posts.export import ExportService
+from posts.trending import TrendingService
+from posts.tasks import start_background_tasks, stop_background_tasks
+from posts.auth_service import AuthService, get_http_client, close_http_client
+from posts.utils import encode_cursor, decode_cursor, dumps_json
+from posts.redis_client import RedisService, redis_client
+from posts.post_cache import PostCacheService
+from posts.http_cache import (
+    ETagMiddleware, cache_headers, etag_for_body, is_not_modified, make_etag, not_modified,
+    set_cache_headers
+)
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_json(content)
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG, default_response_class=FastJSONResponse)
 
 origins = [
     "http://localhost:3000",
@@ -30,111 +45,363 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos los métodos (GET, POST, etc.)
     allow_headers=["*"],  # Permite todos los headers
+    expose_headers=["ETag", "Last-Modified"],
 )
+# ETag por cuerpo para las respuestas JSON que no lo calculan antes
+app.add_middleware(ETagMiddleware)
+# La última en añadirse es la más externa: se comprime el cuerpo ya etiquetado
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+@app.on_event("startup")
+async def on_startup():
+    get_http_client()
+    start_background_tasks(app)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_background_tasks(app)
+    await close_http_client()
+    await redis_client.aclose()
+
+async def merge_view_counts(items: List[dict]) -> List[dict]:
+    # Contador volcado actual más las vistas pendientes (el de la fila puede venir de caché)
+    counts = await ViewCounterService.get_counts({
+        item["id"]: item["view_count"] for item in items if item.get("view_count") is not None
+    })
+    for item in items:
+        if item["id"] in counts:
+            item["view_count"] = counts[item["id"]]
+    return items
+
+async def post_response(post) -> dict:
+    # La fila no incluye las vistas pendientes en Redis: se combinan como en el detalle
+    payload = PostResponse.from_orm(post).model_dump()
+    await merge_view_counts([payload])
+    return payload
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if fields is None:
+        return list(DEFAULT_POST_LIST_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(POST_LIST_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys(["id", *requested]))
+
+def to_list_items(rows: list, fields: List[str]) -> List[dict]:
+    # Las filas traen las columnas en el orden de ``fields``: sin modelos por post
+    return [dict(zip(fields, row)) for row in rows]
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     return await AuthService.validate_token(token)
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials]
+) -> Optional[AuthUser]:
+    # En endpoints públicos un token inválido equivale a no enviarlo
+    if credentials is None:
+        return None
+    try:
+        return await AuthService.validate_token(credentials.credentials)
+    except HTTPException:
+        return None
+
+async def merge_likes(db: AsyncSession, items: List[dict], credentials: Optional[HTTPAuthorizationCredentials]):
+    # Likes de toda la página en un solo viaje a Redis
+    user = await get_optional_user(credentials)
+    info = await LikeService.get_likes_info(
+        db, [item["id"] for item in items], user.user_id if user else 0
+    )
+    for item in items:
+        item["likes_count"], liked = info[item["id"]]
+        item["liked"] = liked if user else None
+    return items
+
 @app.post("/posts", response_model=PostResponse)
 async def create_post(
     post: PostCreate,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return PostService.create_post(db, post, current_user)
+    return await post_response(await PostService.create_post(db, post, current_user))
+
+@app.post("/posts/import", response_model=PostImportResult)
+async def import_posts(
+    request: Request,
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Importación masiva: un PostCreate en JSON por línea (NDJSON), leído en streaming
+    """
+    return await PostImportService.import_ndjson(db, request.stream(), current_user)
+
+def parse_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def split_cursor_page(rows: list, size: int):
+    # Se pide un elemento extra para saber si hay página siguiente
+    has_more = len(rows) > size
+    rows = rows[:size]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+async def build_cursor_page(rows: list, size: int, fields: List[str]) -> dict:
+    rows, next_cursor = split_cursor_page(rows, size)
+    return {
+        "items": await merge_view_counts(to_list_items(rows, fields)),
+        "size": size,
+        "next_cursor": next_cursor
+    }
 
-@app.get("/posts", response_model=PaginatedResponse)
-def get_posts(
+# Los listados devuelven FastJSONResponse directamente: las filas van de la
+# consulta a orjson sin validar modelos (``response_model`` queda para la documentación)
+@app.get(
+    "/posts",
+    response_model=Union[PaginatedResponse, CursorPaginatedResponse]
+)
+async def get_posts(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     published_only: bool = Query(True),
     featured_only: bool = Query(False),
     author_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    with_likes: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Campos separados por comas (por defecto todos salvo content)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    skip = (page - 1) * size
+    fields = parse_fields(fields)
     
-    posts = PostService.get_posts(
-        db, skip=skip, limit=size, published_only=published_only,
-        featured_only=featured_only, author_id=author_id, search=search
-    )
-    
-    total = PostService.get_posts_count(
-        db, published_only=published_only, featured_only=featured_only,
-        author_id=author_id, search=search
-    )
+    # Modo cursor: sin OFFSET ni COUNT(*), cada página cuesta lo mismo
+    if pagination == "cursor" or cursor is not None:
+        rows = await PostService.get_post_rows(
+            db, fields, limit=size + 1, published_only=published_only,
+            featured_only=featured_only, author_id=author_id, search=search,
+            cursor=parse_cursor(cursor)
+        )
+        payload = await build_cursor_page(rows, size, fields)
+        if with_likes:
+            await merge_likes(db, payload["items"], credentials)
+        return FastJSONResponse(payload)
     
-    # Agregar contador de comentarios
-    posts_with_comments = []
-    for post in posts:
-        comments_count = db.query(Comment).filter(
-            Comment.post_id == post.id,
-            Comment.is_approved == True
-        ).count()
+    # Páginas cacheadas (ya serializadas) bajo la versión actual del namespace "posts"
+    try:
+        cache_key = await RedisService.versioned_key(
+            "posts", "list", page, size, published_only, featured_only, author_id,
+            hashlib.sha1((search or "").encode()).hexdigest(), ",".join(fields)
+        )
+        body = await RedisService.get_raw(cache_key)
+    except RedisError:
+        cache_key, body = None, None  # Sin Redis la página se sirve de la base de datos
+    payload = None
+    if body is None:
+        epoch = await ViewCounterService.get_epoch()
+        skip = (page - 1) * size
         
-        post_dict = PostListResponse.from_orm(post).dict()
-        post_dict["comments_count"] = comments_count
-        posts_with_comments.append(PostListResponse(**post_dict))
+        rows = await PostService.get_post_rows(
+            db, fields, skip=skip, limit=size, published_only=published_only,
+            featured_only=featured_only, author_id=author_id, search=search
+        )
+        
+        total = await PostService.get_posts_count(
+            db, published_only=published_only, featured_only=featured_only,
+            author_id=author_id, search=search
+        )
+        
+        # El contador de comentarios viene desnormalizado en cada post
+        payload = {
+            "items": to_list_items(rows, fields),
+            "total": total,
+            "page": page,
+            "size": size,
+            "pages": math.ceil(total / size)
+        }
+        body = dumps_json(payload)
+        if cache_key is not None:
+            try:
+                await RedisService.set_raw(cache_key, body, ttl=settings.POSTS_LIST_CACHE_TTL)
+            except RedisError:
+                pass
+        # El view_count cacheado queda viejo al volcar vistas: se lee del contador reflejado
+        if "view_count" in fields:
+            await ViewCounterService.seed_totals(
+                {item["id"]: item["view_count"] or 0 for item in payload["items"]}, epoch
+            )
     
-    return PaginatedResponse(
-        items=posts_with_comments,
-        total=total,
-        page=page,
-        size=size,
-        pages=math.ceil(total / size)
-    )
+    # Los likes dependen del usuario: esa variante usa el ETag del cuerpo final
+    headers = None
+    if not with_likes:
+        etag = etag_for_body(body)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        headers = cache_headers(etag)
+    
+    if payload is None:
+        payload = orjson.loads(body)
+    await merge_view_counts(payload["items"])
+    if with_likes:
+        await merge_likes(db, payload["items"], credentials)
+    return FastJSONResponse(payload, headers=headers)
 
-@app.get("/posts/{post_id}", response_model=PostResponse)
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    post = PostService.get_post_by_id(db, post_id)
-    if not post:
+@app.get("/posts/trending", response_model=PaginatedResponse)
+async def get_trending_posts(
+    page: int = Query(1, ge=1),
+    size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    with_likes: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Campos separados por comas (por defecto todos salvo content)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Posts con más actividad reciente (vistas, likes y comentarios que pierden peso con el tiempo)
+    """
+    fields = parse_fields(fields)
+    
+    # Rango del sorted set y una consulta por clave primaria, sin agregar sobre la tabla
+    rows, total = await TrendingService.get_feed(db, (page - 1) * size, size, fields)
+    payload = {
+        "items": await merge_view_counts(to_list_items(rows, fields)),
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": math.ceil(total / size)
+    }
+    if with_likes:
+        await merge_likes(db, payload["items"], credentials)
+    return FastJSONResponse(payload)
+
+async def build_post_detail(
+    db: AsyncSession, post: dict, include: Optional[str], comments_size: int
+) -> PostDetailResponse:
+    await merge_view_counts([post])
+    response = PostDetailResponse(**post)
+    
+    # Primera página de comentarios; el resto con GET /posts/{id}/comments?cursor=
+    if include == "comments":
+        comments = await CommentService.get_comments_by_post(db, response.id, limit=comments_size + 1)
+        comments, response.comments_next_cursor = split_cursor_page(comments, comments_size)
+        response.comments = [CommentResponse.from_orm(comment) for comment in comments]
+    return response
+
+def post_detail_etag(post_id: int, version: float, include: Optional[str], comments_size: int) -> str:
+    # Las vistas no cambian la versión: el contador se combina al leer
+    return make_etag("post", post_id, version, include, comments_size if include else None)
+
+async def respond_post_detail(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    post_id: int,
+    include: Optional[str],
+    comments_size: int,
+    slug: Optional[str] = None
+):
+    # La versión se lee antes que el post: un cambio posterior cambia el ETag
+    version, cached = await PostCacheService.peek_version(post_id)
+    etag = post_detail_etag(post_id, version, include, comments_size) if version is not None else None
+    # Solo con el detalle en caché se sabe sin la base de datos que el post existe
+    if etag and is_not_modified(request, etag, version, exists=cached):
+        # 304 sin consultar la base de datos; la vista cuenta igualmente
+        await ViewCounterService.record_view(db, post_id)
+        return not_modified(etag, version)
+    
+    post = await PostService.get_post_detail(db, post_id)
+    # Por slug, el post pudo cambiar de slug desde que se resolvió el id
+    if not post or (slug is not None and post["slug"] != slug):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    # Incrementar contador de vistas
-    post.view_count += 1
-    db.commit()
+    # Registrar la vista (se vuelca en segundo plano)
+    await ViewCounterService.record_view(db, post_id)
     
-    return post
+    if etag is None:
+        # Sin versión previa vale la creada ahora, salvo que una invalidación la fijara durante la carga
+        # (sin Redis no hay versión y la respuesta sale sin validadores)
+        version = await PostCacheService.create_version(post_id)
+        if version is not None:
+            etag = post_detail_etag(post_id, version, include, comments_size)
+    if etag is not None:
+        if is_not_modified(request, etag, version):
+            return not_modified(etag, version)
+        set_cache_headers(response, etag, version)
+    return await build_post_detail(db, post, include, comments_size)
 
-@app.get("/posts/slug/{slug}", response_model=PostResponse)
-def get_post_by_slug(slug: str, db: Session = Depends(get_db)):
-    post = PostService.get_post_by_slug(db, slug)
-    if not post:
+@app.get("/posts/{post_id}", response_model=PostDetailResponse)
+async def get_post(
+    post_id: int,
+    request: Request,
+    response: Response,
+    include: Optional[str] = Query(None, pattern="^comments$"),
+    comments_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await respond_post_detail(request, response, db, post_id, include, comments_size)
+
+@app.get("/posts/slug/{slug}", response_model=PostDetailResponse)
+async def get_post_by_slug(
+    slug: str,
+    request: Request,
+    response: Response,
+    include: Optional[str] = Query(None, pattern="^comments$"),
+    comments_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Se resuelve el id primero para leer la versión antes de cargar el detalle
+    post_id = await PostService.get_post_id_by_slug(db, slug)
+    if post_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
-    return post
+    return await respond_post_detail(request, response, db, post_id, include, comments_size, slug=slug)
 
 @app.put("/posts/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: int,
     post_update: PostUpdate,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    post = PostService.update_post(db, post_id, post_update, current_user)
+    post = await PostService.update_post(db, post_id, post_update, current_user)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found or not authorized"
         )
-    return post
+    return await post_response(post)
 
 @app.delete("/posts/{post_id}")
 async def delete_post(
     post_id: int,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = PostService.delete_post(db, post_id, current_user)
+    success = await PostService.delete_post(db, post_id, current_user)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -142,34 +409,73 @@ async def delete_post(
         )
     return {"message": "Post deleted successfully"}
 
-@app.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
-def get_post_comments(post_id: int, db: Session = Depends(get_db)):
-    return CommentService.get_comments_by_post(db, post_id)
+def stream_comments_ndjson(query) -> StreamingResponse:
+    async def rows():
+        # Sesión propia: la respuesta se sigue enviando tras salir del endpoint
+        async with AsyncSessionLocal() as db:
+            async for comment in CommentService.stream_comments(db, query):
+                yield CommentResponse.from_orm(comment).model_dump_json() + "\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@app.get("/posts/{post_id}/comments", response_model=CommentCursorPaginatedResponse)
+async def get_post_comments(
+    post_id: int,
+    request: Request,
+    response: Response,
+    size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    # Solo "cursor": la lista completa se descarga en NDJSON con /stream
+    pagination: str = Query("cursor", pattern="^cursor$"),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Crear o borrar comentarios avanza la versión del post; sin versión no hay validadores
+    version, cached = await PostCacheService.peek_version(post_id)
+    if version is not None:
+        etag = make_etag("comments", post_id, version, size, cursor)
+        if is_not_modified(request, etag, version, exists=cached):
+            return not_modified(etag, version)
+        set_cache_headers(response, etag, version)
+    
+    comments = await CommentService.get_comments_by_post(
+        db, post_id, limit=size + 1, cursor=parse_cursor(cursor)
+    )
+    comments, next_cursor = split_cursor_page(comments, size)
+    return CommentCursorPaginatedResponse(items=comments, size=size, next_cursor=next_cursor)
+
+@app.get("/posts/{post_id}/comments/stream")
+async def stream_post_comments(post_id: int, cursor: Optional[str] = Query(None)):
+    """
+    Comentarios del post en NDJSON (una línea por comentario) con memoria constante
+    """
+    return stream_comments_ndjson(
+        CommentService.comments_query(post_id=post_id, cursor=parse_cursor(cursor))
+    )
 
 @app.post("/posts/{post_id}/comments", response_model=CommentResponse)
 async def create_comment(
     post_id: int,
     comment: CommentCreate,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verificar que el post existe
-    post = PostService.get_post_by_id(db, post_id)
+    post = await PostService.get_post_by_id(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    return CommentService.create_comment(db, comment, post_id, current_user)
+    return await CommentService.create_comment(db, comment, post_id, current_user)
 
 @app.delete("/comments/{comment_id}")
 async def delete_comment(
     comment_id: int,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = CommentService.delete_comment(db, comment_id, current_user)
+    success = await CommentService.delete_comment(db, comment_id, current_user)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -181,18 +487,17 @@ async def delete_comment(
 async def toggle_like(
     post_id: int,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verificar que el post existe
-    post = PostService.get_post_by_id(db, post_id)
+    post = await PostService.get_post_by_id(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    liked = LikeService.toggle_like(db, post_id, current_user.user_id)
-    likes_count = LikeService.get_likes_count(db, post_id)
+    liked, likes_count = await LikeService.toggle_like(db, post_id, current_user.user_id)
     
     return {
         "liked": liked,
@@ -200,98 +505,159 @@ async def toggle_like(
         "message": "Liked" if liked else "Unliked"
     }
 
+@app.get("/posts/likes/batch", response_model=List[PostLikesInfo])
+async def get_posts_likes_batch(
+    ids: List[int] = Query(..., max_length=settings.MAX_PAGE_SIZE),
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Likes y "me gusta" del usuario para varios posts (una tarjeta por post del feed)
+    """
+    info = await LikeService.get_likes_info(db, ids, current_user.user_id)
+    return [
+        PostLikesInfo(post_id=post_id, likes_count=likes_count, liked=liked)
+        for post_id, (likes_count, liked) in info.items()
+    ]
+
 @app.get("/posts/{post_id}/likes")
-def get_post_likes(post_id: int, db: Session = Depends(get_db)):
-    likes_count = LikeService.get_likes_count(db, post_id)
+async def get_post_likes(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    likes_count = await LikeService.get_likes_count(db, post_id)
     return {"likes_count": likes_count}
 
-@app.get("/my-posts", response_model=PaginatedResponse)
+@app.get(
+    "/my-posts",
+    response_model=Union[PaginatedResponse, CursorPaginatedResponse]
+)
 async def get_my_posts(
     page: int = Query(1, ge=1),
     size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     published_only: bool = Query(False),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Campos separados por comas (por defecto todos salvo content)"),
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    fields = parse_fields(fields)
+    
+    if pagination == "cursor" or cursor is not None:
+        rows = await PostService.get_post_rows(
+            db, fields, limit=size + 1, published_only=published_only,
+            author_id=current_user.user_id, cursor=parse_cursor(cursor)
+        )
+        return FastJSONResponse(await build_cursor_page(rows, size, fields))
+    
     skip = (page - 1) * size
     
-    posts = PostService.get_posts(
-        db, skip=skip, limit=size, published_only=published_only,
+    rows = await PostService.get_post_rows(
+        db, fields, skip=skip, limit=size, published_only=published_only,
         author_id=current_user.user_id
     )
     
-    total = PostService.get_posts_count(
+    total = await PostService.get_posts_count(
         db, published_only=published_only, author_id=current_user.user_id
     )
     
-    # Agregar contador de comentarios
-    posts_with_comments = []
-    for post in posts:
-        comments_count = db.query(Comment).filter(
-            Comment.post_id == post.id,
-            Comment.is_approved == True
-        ).count()
-        
-        post_dict = PostListResponse.from_orm(post).dict()
-        post_dict["comments_count"] = comments_count
-        posts_with_comments.append(PostListResponse(**post_dict))
-    
-    return PaginatedResponse(
-        items=posts_with_comments,
-        total=total,
-        page=page,
-        size=size,
-        pages=math.ceil(total / size)
-    )
+    # El contador de comentarios viene desnormalizado en cada post
+    return FastJSONResponse({
+        "items": await merge_view_counts(to_list_items(rows, fields)),
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": math.ceil(total / size)
+    })
 
 @app.get("/my-stats", response_model=PostStats)
 async def get_my_stats(
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    stats = PostService.get_user_stats(db, current_user.user_id)
+    stats = await PostService.get_user_stats(db, current_user.user_id)
     return PostStats(**stats)
 
 @app.get("/comments/{comment_id}", response_model=CommentResponse)
-def get_comment_by_id(
+async def get_comment_by_id(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await CommentService.get_comment_by_id(db, comment_id)
     if not comment or comment.author_id != current_user.user_id:
         raise HTTPException(status_code=404, detail="Comment not found or not authorized")
     return comment
 
-@app.get("/my-comments", response_model=List[CommentResponse])
-def get_my_comments(
-    db: Session = Depends(get_db),
+@app.get("/my-comments", response_model=CommentCursorPaginatedResponse)
+async def get_my_comments(
+    size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    # Solo "cursor": la lista completa se descarga en NDJSON con /stream
+    pagination: str = Query("cursor", pattern="^cursor$"),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthUser = Depends(get_current_user)
+):
+    comments = await CommentService.get_comments_by_author(
+        db, current_user.user_id, limit=size + 1, cursor=parse_cursor(cursor)
+    )
+    comments, next_cursor = split_cursor_page(comments, size)
+    return CommentCursorPaginatedResponse(items=comments, size=size, next_cursor=next_cursor)
+
+@app.get("/my-comments/stream")
+async def stream_my_comments(
+    cursor: Optional[str] = Query(None),
+    current_user: AuthUser = Depends(get_current_user)
+):
+    return stream_comments_ndjson(
+        CommentService.comments_query(author_id=current_user.user_id, cursor=parse_cursor(cursor))
+    )
+
+@app.get("/my-export")
+async def export_my_content(
+    include: Optional[str] = Query(None, pattern="^(comments|likes)(,(comments|likes))?$"),
+    output: str = Query("ndjson", alias="format", pattern="^(ndjson|gzip)$"),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    return db.query(Comment).filter(
-        Comment.author_id == current_user.user_id
-    ).order_by(desc(Comment.created_at)).all()
+    """
+    Exporta los posts del usuario (y con include= sus comentarios y likes) en NDJSON, en streaming
+    """
+    included = set(include.split(",")) if include else set()
+    
+    async def body():
+        # Sesión propia: la respuesta se sigue enviando tras salir del endpoint
+        async with AsyncSessionLocal() as db:
+            records = ExportService.records(
+                db, current_user.user_id,
+                include_comments="comments" in included, include_likes="likes" in included
+            )
+            async for chunk in ExportService.encode(records, compress=output == "gzip"):
+                yield chunk
+    
+    if output == "gzip":
+        return StreamingResponse(body(), media_type="application/gzip", headers={
+            "Content-Disposition": 'attachment; filename="export.ndjson.gz"',
+            # Ya va comprimido: GZipMiddleware no debe volver a comprimirlo
+            "Content-Encoding": "identity"
+        })
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={
+        "Content-Disposition": 'attachment; filename="export.ndjson"'
+    })
 
 
 @app.get("/posts/{post_id}/liked")
-def check_user_liked_post(
+async def check_user_liked_post(
     post_id: int,
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    liked = db.query(PostLike).filter(
-        PostLike.post_id == post_id,
-        PostLike.user_id == current_user.user_id
-    ).first() is not None
+    liked = await LikeService.has_liked(db, post_id, current_user.user_id)
     return {"liked": liked}
 
 @app.get("/my-likes-count")
-def get_total_likes_from_my_posts(
+async def get_total_likes_from_my_posts(
     current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    posts_ids = db.query(Post.id).filter(Post.author_id == current_user.user_id).subquery()
-    likes_count = db.query(func.count()).select_from(PostLike).filter(PostLike.post_id.in_(posts_ids)).scalar()
+    likes_count = await LikeService.get_total_likes_for_author(db, current_user.user_id)
     return {"total_likes": likes_count}
 
 @app.get("/health")
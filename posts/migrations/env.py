@@ -0,0 +1,52 @@
+"""Entorno de Alembic del microservicio de posts."""
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from posts.config import settings
+from posts.database import Base
+import posts.models  # noqa: F401  (registra las tablas en Base.metadata)
+
+# Ambos servicios comparten base de datos: cada uno lleva su propia tabla de versiones
+VERSION_TABLE = "alembic_version_posts"
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Ignorar tablas de otros servicios y las gestionadas con SQL propio (post_search)
+    if type_ == "table" and reflected and compare_to is None:
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        version_table=VERSION_TABLE,
+        include_object=include_object,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            version_table=VERSION_TABLE,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,72 @@
+"""Esquema inicial de posts (el que creaba ``create_all``)
+
+Las bases de datos creadas antes de usar migraciones ya tienen estas
+tablas: solo se crean las que faltan.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "posts" not in existing:
+        op.create_table(
+            "posts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("summary", sa.String(500), nullable=True),
+            sa.Column("author_id", sa.Integer(), nullable=False),
+            sa.Column("author_email", sa.String(), nullable=False),
+            sa.Column("author_username", sa.String(), nullable=False),
+            sa.Column("slug", sa.String(), nullable=False),
+            sa.Column("is_published", sa.Boolean(), nullable=True),
+            sa.Column("is_featured", sa.Boolean(), nullable=True),
+            sa.Column("view_count", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_posts_id", "posts", ["id"])
+        op.create_index("ix_posts_author_id", "posts", ["author_id"])
+        op.create_index("ix_posts_slug", "posts", ["slug"], unique=True)
+
+    if "comments" not in existing:
+        op.create_table(
+            "comments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=False),
+            sa.Column("author_id", sa.Integer(), nullable=False),
+            sa.Column("author_email", sa.String(), nullable=False),
+            sa.Column("author_username", sa.String(), nullable=False),
+            sa.Column("is_approved", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_comments_id", "comments", ["id"])
+
+    if "post_likes" not in existing:
+        op.create_table(
+            "post_likes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_post_likes_id", "post_likes", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("post_likes")
+    op.drop_table("comments")
+    op.drop_table("posts")
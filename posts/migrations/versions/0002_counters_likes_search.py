@@ -0,0 +1,132 @@
+"""Contador de comentarios, likes únicos, estadísticas por autor e índice de búsqueda
+
+Se aplica sobre bases de datos que ya tuvieran alguna de estas piezas
+(creadas por ``create_all`` o ``SearchService``): cada paso comprueba antes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from posts.config import settings
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+PG_SEARCH_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS post_search (
+        post_id INTEGER PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_post_search_document ON post_search USING GIN (document)",
+]
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5(
+        title, content, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+# Backfill de los posts que aún no están en el índice (equivale a ``rebuild-search-index``)
+PG_SEARCH_BACKFILL = """
+    INSERT INTO post_search (post_id, document)
+    SELECT
+        id,
+        setweight(to_tsvector(CAST(:config AS regconfig), title), 'A') ||
+        setweight(to_tsvector(CAST(:config AS regconfig), content), 'B')
+    FROM posts
+    ON CONFLICT (post_id) DO NOTHING
+"""
+
+SQLITE_SEARCH_BACKFILL = """
+    INSERT INTO post_search (rowid, title, content)
+    SELECT id, title, content FROM posts
+    WHERE id NOT IN (SELECT rowid FROM post_search)
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # posts.comments_count (solo comentarios aprobados)
+    if "comments_count" not in {c["name"] for c in inspector.get_columns("posts")}:
+        op.add_column(
+            "posts",
+            sa.Column("comments_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.execute("""
+            UPDATE posts SET comments_count = (
+                SELECT COUNT(comments.id) FROM comments
+                WHERE comments.post_id = posts.id AND comments.is_approved = true
+            )
+        """)
+
+    # Un like por usuario y post: se eliminan los duplicados antes de la restricción
+    constraints = {c["name"] for c in inspector.get_unique_constraints("post_likes")}
+    if "uq_post_likes_post_user" not in constraints:
+        op.execute("""
+            DELETE FROM post_likes WHERE id NOT IN (
+                SELECT MIN(id) FROM post_likes GROUP BY post_id, user_id
+            )
+        """)
+        with op.batch_alter_table("post_likes") as batch_op:
+            batch_op.create_unique_constraint("uq_post_likes_post_user", ["post_id", "user_id"])
+
+    if "author_stats" not in inspector.get_table_names():
+        op.create_table(
+            "author_stats",
+            sa.Column("author_id", sa.Integer(), primary_key=True, autoincrement=False),
+            *(
+                sa.Column(name, sa.Integer(), nullable=False, server_default="0")
+                for name in (
+                    "total_posts", "published_posts", "draft_posts", "featured_posts",
+                    "total_views", "total_likes", "total_comments",
+                )
+            ),
+        )
+        # Backfill (equivale a ``rebuild-author-stats``)
+        op.execute("""
+            INSERT INTO author_stats (
+                author_id, total_posts, published_posts, draft_posts,
+                featured_posts, total_views, total_likes, total_comments
+            )
+            SELECT
+                author_id,
+                COUNT(id),
+                SUM(CASE WHEN is_published = true THEN 1 ELSE 0 END),
+                SUM(CASE WHEN is_published = false THEN 1 ELSE 0 END),
+                SUM(CASE WHEN is_featured = true THEN 1 ELSE 0 END),
+                COALESCE(SUM(view_count), 0),
+                (SELECT COUNT(post_likes.id) FROM post_likes
+                 JOIN posts AS liked ON liked.id = post_likes.post_id
+                 WHERE liked.author_id = posts.author_id),
+                COALESCE(SUM(comments_count), 0)
+            FROM posts
+            GROUP BY author_id
+        """)
+
+    # Índice de búsqueda de texto completo con los posts existentes
+    statements = {"postgresql": PG_SEARCH_DDL, "sqlite": SQLITE_SEARCH_DDL}.get(bind.dialect.name, [])
+    for statement in statements:
+        op.execute(statement)
+    if bind.dialect.name == "postgresql":
+        op.execute(sa.text(PG_SEARCH_BACKFILL).bindparams(config=settings.SEARCH_LANGUAGE))
+    elif bind.dialect.name == "sqlite":
+        op.execute(SQLITE_SEARCH_BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS post_search")
+    op.drop_table("author_stats")
+    with op.batch_alter_table("post_likes") as batch_op:
+        batch_op.drop_constraint("uq_post_likes_post_user", type_="unique")
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("comments_count")
@@ -0,0 +1,46 @@
+"""Índices compuestos para las consultas más frecuentes
+
+- feed: ``WHERE is_published ORDER BY created_at``
+- páginas de autor: ``WHERE author_id ORDER BY created_at``
+- comentarios de un post: ``WHERE post_id AND is_approved ORDER BY created_at``
+
+Los likes por ``(post_id, user_id)`` ya los cubre ``uq_post_likes_post_user``.
+``ix_posts_author_id`` queda redundante con el índice de autor.
+
+En PostgreSQL se crean con ``CONCURRENTLY`` para no bloquear escrituras.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_posts_published_created", "posts", ["is_published", "created_at"]),
+    ("ix_posts_author_created", "posts", ["author_id", "created_at"]),
+    ("ix_comments_post_approved_created", "comments", ["post_id", "is_approved", "created_at"]),
+]
+
+
+def _concurrently() -> dict:
+    return {"postgresql_concurrently": True} if op.get_bind().dialect.name == "postgresql" else {}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **_concurrently())
+        op.drop_index("ix_posts_author_id", table_name="posts", if_exists=True, **_concurrently())
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_posts_author_id", "posts", ["author_id"], if_not_exists=True, **_concurrently())
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, **_concurrently())
@@ -0,0 +1,31 @@
+"""Índice de comentarios por autor para ``/my-comments``
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _concurrently() -> dict:
+    return {"postgresql_concurrently": True} if op.get_bind().dialect.name == "postgresql" else {}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_comments_author_created", "comments", ["author_id", "created_at"],
+            if_not_exists=True, **_concurrently()
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_comments_author_created", table_name="comments", if_exists=True, **_concurrently()
+        )
@@ -1,30 +1,44 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from posts.database import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Feed y páginas de autor (ver migración 0003)
+        Index("ix_posts_published_created", "is_published", "created_at"),
+        Index("ix_posts_author_created", "author_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(String(500), nullable=True)
-    author_id = Column(Integer, nullable=False, index=True)
+    author_id = Column(Integer, nullable=False)
     author_email = Column(String, nullable=False)
     author_username = Column(String, nullable=False)
     slug = Column(String, unique=True, index=True, nullable=False)
     is_published = Column(Boolean, default=False)
     is_featured = Column(Boolean, default=False)
     view_count = Column(Integer, default=0)
+    # Contador desnormalizado de comentarios aprobados
+    comments_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relación con comentarios
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
+    
+    # Recuperar created_at/updated_at al hacer flush (sin cargas implícitas en async)
+    __mapper_args__ = {"eager_defaults": True}
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_approved_created", "post_id", "is_approved", "created_at"),
+        Index("ix_comments_author_created", "author_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -38,11 +52,30 @@ class Comment(Base):
     
     # Relación con post
     post = relationship("Post", back_populates="comments")
+    
+    __mapper_args__ = {"eager_defaults": True}
 
 class PostLike(Base):
     __tablename__ = "post_likes"
+    __table_args__ = (
+        # Un like por usuario y post
+        UniqueConstraint("post_id", "user_id", name="uq_post_likes_post_user"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
     user_id = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AuthorStats(Base):
+    """Estadísticas por autor mantenidas de forma incremental"""
+    __tablename__ = "author_stats"
+    
+    author_id = Column(Integer, primary_key=True)
+    total_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    published_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    draft_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    featured_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    total_views = Column(Integer, nullable=False, default=0, server_default="0")
+    total_likes = Column(Integer, nullable=False, default=0, server_default="0")
+    total_comments = Column(Integer, nullable=False, default=0, server_default="0")
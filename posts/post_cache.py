@@ -0,0 +1,209 @@
+"""Caché read-through del detalle de posts con coalescencia de peticiones.
+
+El ``PostResponse`` serializado se guarda en ``post:id:{id}`` y el slug se
+resuelve con ``post:slug:{slug}`` -> id. ``post:version:{id}`` guarda el
+instante de la última invalidación y sirve de validador HTTP (ETag y
+Last-Modified) sin tocar la base de datos. Cuando una entrada expira, solo una
+petición (por proceso y entre procesos, mediante un lock en Redis) carga el
+post desde la base de datos; el resto espera a que aparezca en caché. La
+carga solo se guarda si la versión no cambió mientras se leía el post.
+El ``view_count`` guardado no se usa al leer: se sustituye por el contador
+de ``post:views:{id}``, así que volcar vistas no invalida la entrada.
+Si Redis no responde el detalle se lee directamente de la base de datos y
+no hay versión (la respuesta sale sin validadores).
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.config import settings
+from posts.models import Post
+from posts.redis_client import redis_client
+from posts.schemas import PostResponse
+from posts.view_counter import ViewCounterService, view_total_key
+
+# Libera el lock solo si sigue siendo nuestro
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Guarda el detalle solo si la versión sigue siendo la leída antes de la carga
+STORE_POST_SCRIPT = """
+if (redis.call("get", KEYS[3]) or "") ~= ARGV[1] then
+    return 0
+end
+redis.call("set", KEYS[1], ARGV[3], "EX", ARGV[2])
+redis.call("set", KEYS[2], ARGV[4], "EX", ARGV[2])
+return 1
+"""
+
+# Lock por clave y número de peticiones que lo usan
+_local_locks: Dict[str, list] = {}
+
+
+def _id_key(post_id: int) -> str:
+    return f"post:id:{post_id}"
+
+
+def _slug_key(slug: str) -> str:
+    return f"post:slug:{slug}"
+
+
+def _version_key(post_id: int) -> str:
+    return f"post:version:{post_id}"
+
+
+async def _single_flight(
+    key: str,
+    fetch: Callable[[], Awaitable[Optional[dict]]],
+    load: Callable[[], Awaitable[Optional[dict]]]
+) -> Optional[dict]:
+    value = await fetch()
+    if value is not None:
+        return value
+
+    # Coalescencia dentro del proceso
+    entry = _local_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await _load_once(key, fetch, load)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _local_locks.pop(key, None)
+
+
+async def _load_once(
+    key: str,
+    fetch: Callable[[], Awaitable[Optional[dict]]],
+    load: Callable[[], Awaitable[Optional[dict]]]
+) -> Optional[dict]:
+    value = await fetch()
+    if value is not None:
+        return value
+
+    # Coalescencia entre procesos
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    timeout = settings.POST_CACHE_LOCK_TIMEOUT
+    if await redis_client.set(lock_key, token, nx=True, px=int(timeout * 1000)):
+        try:
+            return await load()
+        finally:
+            await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        value = await fetch()
+        if value is not None:
+            return value
+        if not await redis_client.exists(lock_key):
+            break
+
+    # El otro proceso falló o no encontró el post
+    return await load()
+
+
+class PostCacheService:
+    @staticmethod
+    async def _fetch_by_id(post_id: int) -> Optional[dict]:
+        # Sin el contador de vistas reflejado se recarga para volver a sembrarlo
+        value, views = await redis_client.mget(_id_key(post_id), view_total_key(post_id))
+        return json.loads(value) if value and views is not None else None
+
+    @staticmethod
+    async def _query(db: AsyncSession, post_id: int) -> Optional[Post]:
+        # Sin comentarios: el detalle cuesta lo mismo tenga los que tenga
+        return await db.scalar(select(Post).where(Post.id == post_id))
+
+    @staticmethod
+    async def _load(db: AsyncSession, post_id: int) -> Optional[dict]:
+        # Una invalidación durante la lectura cambia la versión y descarta la escritura
+        version = await redis_client.get(_version_key(post_id)) or ""
+        epoch = await ViewCounterService.get_epoch()
+        post = await PostCacheService._query(db, post_id)
+        if not post:
+            return None
+
+        payload = PostResponse.from_orm(post).model_dump(mode="json")
+        await redis_client.eval(
+            STORE_POST_SCRIPT, 3, _id_key(post.id), _slug_key(post.slug), _version_key(post.id),
+            version, settings.POST_CACHE_TTL, json.dumps(payload), post.id
+        )
+        await ViewCounterService.seed_totals({post.id: post.view_count or 0}, epoch)
+        return payload
+
+    @staticmethod
+    async def get_post(db: AsyncSession, post_id: int) -> Optional[dict]:
+        """Detalle serializado del post por id (lectura a través de caché)"""
+        try:
+            return await _single_flight(
+                _id_key(post_id),
+                lambda: PostCacheService._fetch_by_id(post_id),
+                lambda: PostCacheService._load(db, post_id)
+            )
+        except RedisError:
+            # Sin Redis se sirve directamente de la base de datos
+            post = await PostCacheService._query(db, post_id)
+            return PostResponse.from_orm(post).model_dump(mode="json") if post else None
+
+    @staticmethod
+    async def create_version(post_id: int) -> Optional[float]:
+        """Crea la versión si no existe; ``None`` si otra petición (p. ej. una invalidación) la fijó antes"""
+        version = time.time()
+        try:
+            created = await redis_client.set(
+                _version_key(post_id), version, nx=True, ex=settings.POST_VERSION_TTL
+            )
+        except RedisError:
+            return None
+        return version if created else None
+
+    @staticmethod
+    async def peek_version(post_id: int) -> Tuple[Optional[float], bool]:
+        """(versión sin crearla, si el detalle está en caché); lo segundo confirma que el post existe"""
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(_version_key(post_id))
+        pipe.exists(_id_key(post_id))
+        try:
+            version, cached = await pipe.execute()
+        except RedisError:
+            return None, False
+        return (float(version) if version is not None else None), bool(cached)
+
+    @staticmethod
+    async def resolve_slug(db: AsyncSession, slug: str) -> Optional[int]:
+        """Id del post con ese slug (de caché o de la base de datos), sin cargar el detalle"""
+        try:
+            post_id = await redis_client.get(_slug_key(slug))
+        except RedisError:
+            post_id = None
+        if post_id:
+            return int(post_id)
+        return await db.scalar(select(Post.id).where(Post.slug == slug))
+
+    @staticmethod
+    async def invalidate(*post_ids: int, slugs: tuple = (), pipe=None):
+        """Elimina el detalle cacheado y avanza la versión; con ``pipe`` solo encola los comandos"""
+        keys = [_id_key(post_id) for post_id in post_ids]
+        keys += [_slug_key(slug) for slug in slugs]
+        if not keys:
+            return
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(*keys)
+        version = time.time()
+        for post_id in post_ids:
+            pipe.set(_version_key(post_id), version, ex=settings.POST_VERSION_TTL)
+        if own_pipe:
+            await pipe.execute()
@@ -0,0 +1,123 @@
+"""Importación masiva de posts desde NDJSON.
+
+Cada línea se valida contra ``PostCreate`` a medida que llega y las válidas
+se insertan por lotes con un INSERT multi-fila, con los slugs definitivos ya
+calculados. Las líneas inválidas y las filas que rechaza la base de datos se
+informan con su número de línea sin abortar el resto, y la caché de listados
+se invalida una sola vez al final.
+"""
+from collections import Counter
+from typing import AsyncIterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.author_stats import AuthorStatsService
+from posts.config import settings
+from posts.models import Post
+from posts.redis_client import RedisService
+from posts.schemas import AuthUser, PostCreate, PostImportResult
+from posts.search import SearchService
+from posts.utils import truncate_text, unique_slug
+
+posts_table = Post.__table__
+
+
+async def _numbered_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    # Solo se guarda en memoria la línea incompleta del último bloque
+    buffer, number = b"", 0
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, line
+    if buffer:
+        yield number + 1, buffer
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc'])) or 'line'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+class PostImportService:
+    @staticmethod
+    async def import_ndjson(
+        db: AsyncSession, chunks: AsyncIterator[bytes], author: AuthUser
+    ) -> PostImportResult:
+        """Importa un ``PostCreate`` por línea a nombre de ``author``"""
+        report = {"imported": 0, "failed": 0, "errors": []}
+        batch: List[Tuple[int, PostCreate]] = []
+        async for line_number, line in _numbered_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, PostCreate.model_validate_json(line)))
+            except ValidationError as exc:
+                PostImportService._record_error(report, line_number, _describe(exc))
+                continue
+            if len(batch) >= settings.POSTS_IMPORT_BATCH_SIZE:
+                await PostImportService._import_batch(db, batch, author, report)
+                batch = []
+        if batch:
+            await PostImportService._import_batch(db, batch, author, report)
+
+        if report["imported"]:
+            await RedisService.bump_namespace("posts")
+        return PostImportResult(**report)
+
+    @staticmethod
+    def _record_error(report: dict, line_number: int, error: str):
+        report["failed"] += 1
+        if len(report["errors"]) < settings.POSTS_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_number, "error": error})
+
+    @staticmethod
+    async def _import_batch(
+        db: AsyncSession, batch: List[Tuple[int, PostCreate]], author: AuthUser, report: dict
+    ):
+        try:
+            await PostImportService._insert(db, [post for _, post in batch], author)
+            await db.commit()
+            report["imported"] += len(batch)
+        except DBAPIError as exc:
+            await db.rollback()
+            if len(batch) == 1:
+                error = str(exc.orig).splitlines()[0] if exc.orig else str(exc)
+                PostImportService._record_error(report, batch[0][0], f"rejected by the database: {error}")
+                return
+            # Se reintenta fila a fila para aislar las que fallan (con slugs nuevos,
+            # por si el fallo era una colisión)
+            for entry in batch:
+                await PostImportService._import_batch(db, [entry], author, report)
+
+    @staticmethod
+    async def _insert(db: AsyncSession, posts: List[PostCreate], author: AuthUser):
+        rows = [
+            {
+                "title": post.title,
+                "content": post.content,
+                "summary": post.summary or truncate_text(post.content),
+                "author_id": author.user_id,
+                "author_email": author.email,
+                "author_username": author.username,
+                "slug": unique_slug(post.title),
+                "is_published": post.is_published,
+                "is_featured": post.is_featured,
+            }
+            for post in posts
+        ]
+        post_ids = (await db.scalars(
+            insert(posts_table).returning(posts_table.c.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+        await SearchService.index_posts(db, [
+            {"post_id": post_id, "title": post.title, "content": post.content}
+            for post_id, post in zip(post_ids, posts)
+        ])
+
+        deltas = Counter()
+        for post in posts:
+            deltas.update(AuthorStatsService.post_deltas(post))
+        await AuthorStatsService.adjust(db, author.user_id, deltas)
@@ -0,0 +1,105 @@
+"""Comprobación de planes de ejecución de las consultas calientes.
+
+Cada caso ejecuta un método de ``PostService`` (y las lecturas de
+comentarios y likes que acompañan a un post) capturando el SQL emitido, y
+luego pide el plan de cada sentencia con ``EXPLAIN``. Un caso falla si
+alguna tabla se recorre entera:
+
+- PostgreSQL: ``Seq Scan`` con ``enable_seqscan = off``, que solo lo elige si
+  no existe ningún índice utilizable (con tablas pequeñas lo elegiría igual).
+- SQLite: ``SCAN <tabla>`` sin índice en ``EXPLAIN QUERY PLAN``.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.database import async_engine
+from posts.services import PostService, CommentService
+from posts.like_store import LikeStore
+from posts.trending import TrendingService
+from posts.schemas import DEFAULT_POST_LIST_FIELDS
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+AUTHOR_ID = 1
+CURSOR = (datetime(2024, 1, 1, tzinfo=timezone.utc), 1)
+FIELDS = DEFAULT_POST_LIST_FIELDS
+
+# (nombre, consulta) con los parámetros que usan los endpoints
+PLAN_CASES: List[Tuple[str, Callable[[AsyncSession], Awaitable]]] = [
+    ("feed", lambda db: PostService.get_post_rows(db, FIELDS, limit=10)),
+    ("feed-count", lambda db: PostService.get_posts_count(db)),
+    ("feed-cursor", lambda db: PostService.get_post_rows(db, FIELDS, limit=11, cursor=CURSOR)),
+    ("feed-featured", lambda db: PostService.get_post_rows(db, FIELDS, limit=10, featured_only=True)),
+    ("feed-search", lambda db: PostService.get_post_rows(db, FIELDS, limit=10, search="python")),
+    ("feed-search-count", lambda db: PostService.get_posts_count(db, search="python")),
+    ("author-page", lambda db: PostService.get_post_rows(
+        db, FIELDS, limit=10, published_only=False, author_id=AUTHOR_ID
+    )),
+    ("author-count", lambda db: PostService.get_posts_count(db, published_only=False, author_id=AUTHOR_ID)),
+    ("author-cursor", lambda db: PostService.get_post_rows(
+        db, FIELDS, limit=11, published_only=False, author_id=AUTHOR_ID, cursor=CURSOR
+    )),
+    ("post-by-id", lambda db: PostService.get_post_by_id(db, 1)),
+    ("post-by-slug", lambda db: PostService.get_post_by_slug(db, "plan-check-1")),
+    ("author-stats", lambda db: PostService.get_user_stats(db, AUTHOR_ID)),
+    ("post-comments", lambda db: CommentService.get_comments_by_post(db, 1)),
+    ("post-comments-cursor", lambda db: CommentService.get_comments_by_post(db, 1, limit=11, cursor=CURSOR)),
+    ("author-comments-cursor", lambda db: CommentService.get_comments_by_author(
+        db, AUTHOR_ID, limit=11, cursor=CURSOR
+    )),
+    ("post-likes", lambda db: LikeStore._read_many_in_db(db, [1, 2], AUTHOR_ID)),
+    ("trending-page", lambda db: TrendingService.get_rows(db, [1, 2], FIELDS)),
+]
+
+
+@contextmanager
+def capture_statements(statements: list):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _explain(db: AsyncSession, statement: str, parameters) -> List[str]:
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return [row[0] for row in result]
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[-1] for row in result]
+
+
+def _full_scans(dialect: str, plan: List[str]) -> List[str]:
+    if dialect == "postgresql":
+        return [line.strip() for line in plan if "Seq Scan" in line]
+    return [line for line in plan if SQLITE_FULL_SCAN.match(line.strip())]
+
+
+class QueryPlanService:
+    @staticmethod
+    async def check(db: AsyncSession) -> List[str]:
+        """Devuelve los casos que recorren alguna tabla entera (vacío si todo va por índice)"""
+        dialect = db.bind.dialect.name
+        failures = []
+        for name, run_case in PLAN_CASES:
+            statements = []
+            with capture_statements(statements):
+                await run_case(db)
+
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = await _explain(db, statement, parameters)
+                for scan in _full_scans(dialect, plan):
+                    failures.append(f"{name}: {scan}\n    {' '.join(statement.split())}")
+            await db.rollback()
+        return failures
@@ -1,25 +1,46 @@
-import redis
-import json
+import redis.asyncio as redis
+from typing import Optional
 from posts.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Pool bloqueante: por encima de REDIS_MAX_CONNECTIONS los comandos esperan
+# una conexión libre (hasta REDIS_POOL_TIMEOUT) en lugar de fallar
+redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT
+))
 
 class RedisService:
     @staticmethod
-    def set_cache(key: str, value: dict, ttl: int = settings.REDIS_TTL):
-        redis_client.setex(key, ttl, json.dumps(value))
+    def pipeline():
+        """Agrupa varios comandos en un solo viaje de ida y vuelta"""
+        return redis_client.pipeline(transaction=False)
     
     @staticmethod
-    def get_cache(key: str) -> dict:
-        value = redis_client.get(key)
-        return json.loads(value) if value else None
+    async def set_raw(key: str, value: bytes, ttl: int = settings.REDIS_TTL):
+        """Guarda un cuerpo ya serializado (sin volver a pasar por json)"""
+        await redis_client.setex(key, ttl, value)
     
     @staticmethod
-    def delete_cache(key: str):
-        redis_client.delete(key)
+    async def get_raw(key: str) -> Optional[str]:
+        return await redis_client.get(key)
     
     @staticmethod
-    def delete_pattern(pattern: str):
-        keys = redis_client.keys(pattern)
-        if keys:
-            redis_client.delete(*keys)
\ No newline at end of file
+    async def get_namespace_version(namespace: str) -> int:
+        value = await redis_client.get(f"{namespace}:version")
+        return int(value) if value else 0
+    
+    @staticmethod
+    async def bump_namespace(namespace: str, pipe=None) -> Optional[int]:
+        """Invalida en O(1) todas las claves versionadas del namespace"""
+        if pipe is not None:
+            pipe.incr(f"{namespace}:version")
+            return None
+        return await redis_client.incr(f"{namespace}:version")
+    
+    @staticmethod
+    async def versioned_key(namespace: str, *parts) -> str:
+        # Las claves de versiones anteriores dejan de leerse y expiran por TTL
+        version = await RedisService.get_namespace_version(namespace)
+        return ":".join([namespace, f"v{version}", *map(str, parts)])
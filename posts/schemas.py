@@ -31,6 +31,16 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     pass
 
+class PostImportError(BaseModel):
+    line: int
+    error: str
+
+class PostImportResult(BaseModel):
+    imported: int
+    failed: int
+    # Solo los primeros POSTS_IMPORT_MAX_ERRORS; ``failed`` cuenta todos
+    errors: List[PostImportError]
+
 class PostUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     content: Optional[str] = Field(None, min_length=1)
@@ -46,30 +56,45 @@ class PostResponse(PostBase):
     slug: str
     content: str
     view_count: int
+    comments_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
-    comments: List[CommentResponse] = []
     
     class Config:
         from_attributes = True
 
+class PostDetailResponse(PostResponse):
+    # Solo con ``include=comments``: los primeros comentarios y el cursor para seguir
+    comments: Optional[List[CommentResponse]] = None
+    comments_next_cursor: Optional[str] = None
+
 class PostListResponse(BaseModel):
+    # Con ``fields=`` solo se devuelven los campos pedidos (y siempre ``id``)
     id: int
-    title: str
+    title: Optional[str] = None
     summary: Optional[str] = None
-    author_id: int
-    author_username: str
-    content:str
-    slug: str
-    is_published: bool
-    is_featured: bool
-    view_count: int
-    created_at: datetime
-    comments_count: int = 0
+    author_id: Optional[int] = None
+    author_username: Optional[str] = None
+    content: Optional[str] = None
+    slug: Optional[str] = None
+    is_published: Optional[bool] = None
+    is_featured: Optional[bool] = None
+    view_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    comments_count: Optional[int] = None
+    # Solo se rellenan con ``with_likes=true``
+    likes_count: Optional[int] = None
+    liked: Optional[bool] = None
     
     class Config:
         from_attributes = True
 
+# Campos seleccionables con ``fields=``; por defecto se omite ``content``
+POST_LIST_FIELDS = tuple(
+    field for field in PostListResponse.model_fields if field not in ("likes_count", "liked")
+)
+DEFAULT_POST_LIST_FIELDS = tuple(field for field in POST_LIST_FIELDS if field != "content")
+
 class PaginatedResponse(BaseModel):
     items: List[PostListResponse]
     total: int
@@ -77,6 +102,21 @@ class PaginatedResponse(BaseModel):
     size: int
     pages: int
 
+class CursorPaginatedResponse(BaseModel):
+    items: List[PostListResponse]
+    size: int
+    next_cursor: Optional[str] = None
+
+class CommentCursorPaginatedResponse(BaseModel):
+    items: List[CommentResponse]
+    size: int
+    next_cursor: Optional[str] = None
+
+class PostLikesInfo(BaseModel):
+    post_id: int
+    likes_count: int
+    liked: bool
+
 class AuthUser(BaseModel):
     user_id: int
     email: str
@@ -87,4 +127,6 @@ class PostStats(BaseModel):
     published_posts: int
     draft_posts: int
     total_views: int
-    featured_posts: int
\ No newline at end of file
+    featured_posts: int
+    total_likes: int = 0
+    total_comments: int = 0
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""Índice de búsqueda de texto completo para posts.
+
+En PostgreSQL se mantiene una tabla ``post_search`` con un ``tsvector`` por
+post e índice GIN; en SQLite (desarrollo y pruebas locales) se usa una tabla
+virtual FTS5 con el id del post como ``rowid``. Con cualquier otro motor se
+recurre al filtro ILIKE original. Las tablas se crean en la migración 0002.
+"""
+from sqlalchemy import text, func, cast, literal_column, select, table, column
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from posts.config import settings
+from posts.models import Post
+
+# Tablas ligeras (fuera de Base.metadata) para componer las consultas
+pg_search_table = table("post_search", column("post_id"), column("document"))
+fts_search_table = table("post_search", column("rowid"), column("title"), column("content"))
+
+
+def _dialect(db_or_engine) -> str:
+    bind = getattr(db_or_engine, "bind", None) or db_or_engine
+    return bind.dialect.name
+
+
+def _fts_query(search: str) -> str:
+    # Cada término entre comillas para que la sintaxis de FTS5 no rompa la consulta
+    terms = [term.replace('"', '""') for term in search.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class SearchService:
+    @staticmethod
+    async def index_post(db: AsyncSession, post: Post):
+        """Inserta o actualiza el documento del post (sin hacer commit)"""
+        await SearchService.index_posts(
+            db, [{"post_id": post.id, "title": post.title, "content": post.content}]
+        )
+
+    @staticmethod
+    async def index_posts(db: AsyncSession, documents: List[dict]):
+        """Indexa varios posts (``{"post_id", "title", "content"}``) con un executemany"""
+        if not documents:
+            return
+        dialect = _dialect(db)
+        if dialect == "postgresql":
+            await db.execute(text("""
+                INSERT INTO post_search (post_id, document)
+                VALUES (
+                    :post_id,
+                    setweight(to_tsvector(CAST(:config AS regconfig), :title), 'A') ||
+                    setweight(to_tsvector(CAST(:config AS regconfig), :content), 'B')
+                )
+                ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document
+            """), [{**document, "config": settings.SEARCH_LANGUAGE} for document in documents])
+        elif dialect == "sqlite":
+            await db.execute(
+                text("DELETE FROM post_search WHERE rowid = :post_id"),
+                [{"post_id": document["post_id"]} for document in documents]
+            )
+            await db.execute(
+                text("INSERT INTO post_search (rowid, title, content) VALUES (:post_id, :title, :content)"),
+                documents
+            )
+
+    @staticmethod
+    async def remove_post(db: AsyncSession, post_id: int):
+        """Elimina el documento del post del índice (sin hacer commit)"""
+        dialect = _dialect(db)
+        if dialect == "postgresql":
+            await db.execute(text("DELETE FROM post_search WHERE post_id = :post_id"), {"post_id": post_id})
+        elif dialect == "sqlite":
+            await db.execute(text("DELETE FROM post_search WHERE rowid = :post_id"), {"post_id": post_id})
+
+    @staticmethod
+    async def rebuild_index(db: AsyncSession, batch_size: int = 500) -> int:
+        """Reconstruye el índice completo a partir de la tabla de posts"""
+        dialect = _dialect(db)
+        if dialect == "postgresql":
+            await db.execute(text("TRUNCATE post_search"))
+        elif dialect == "sqlite":
+            await db.execute(text("DELETE FROM post_search"))
+        else:
+            return 0
+
+        # Recorrido por lotes de id para no cargar toda la tabla; un executemany por lote
+        indexed, last_id = 0, 0
+        while True:
+            rows = (await db.execute(
+                select(Post.id, Post.title, Post.content)
+                .where(Post.id > last_id).order_by(Post.id).limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            await SearchService.index_posts(db, [
+                {"post_id": post_id, "title": title, "content": content}
+                for post_id, title, content in rows
+            ])
+            indexed += len(rows)
+            last_id = rows[-1].id
+        await db.commit()
+        return indexed
+
+    @staticmethod
+    def apply_search(query, db: AsyncSession, search: str) -> Tuple[object, Optional[object]]:
+        """Filtra la consulta por el término buscado.
+
+        Devuelve la consulta filtrada y la expresión de relevancia para ordenar
+        (de mayor a menor relevancia), o ``None`` si el motor no la soporta.
+        """
+        dialect = _dialect(db)
+        if dialect == "postgresql":
+            ts_query = func.websearch_to_tsquery(
+                cast(settings.SEARCH_LANGUAGE, REGCONFIG), search
+            )
+            document = pg_search_table.c.document
+            query = query.join(
+                pg_search_table, pg_search_table.c.post_id == Post.id
+            ).filter(document.op("@@")(ts_query))
+            return query, func.ts_rank(document, ts_query).desc()
+
+        if dialect == "sqlite":
+            fts_query = _fts_query(search)
+            if not fts_query:
+                return query, None
+            query = query.join(
+                fts_search_table, fts_search_table.c.rowid == Post.id
+            ).filter(literal_column("post_search").op("MATCH")(fts_query))
+            # bm25 devuelve valores menores para documentos más relevantes
+            return query, func.bm25(literal_column("post_search"), 10.0, 1.0).asc()
+
+        query = query.filter(
+            Post.title.ilike(f"%{search}%") |
+            Post.content.ilike(f"%{search}%")
+        )
+        return query, None
@@ -1,56 +1,69 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import func, desc, asc, select, update, delete, Row
+from sqlalchemy.exc import IntegrityError
 from posts.models import Post, Comment, PostLike
 from posts.schemas import PostCreate, PostUpdate, CommentCreate, AuthUser
-from posts.utils import create_slug, truncate_text
+from posts.utils import truncate_text, unique_slug
 from posts.redis_client import RedisService
-from typing import List, Optional
+from posts.search import SearchService
+from posts.post_cache import PostCacheService
+from posts.like_store import LikeStore
+from posts.author_stats import AuthorStatsService
+from posts.trending import TrendingService, decayed
+from posts.config import settings
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import datetime
 import json
+import time
+
+# Intentos ante una colisión de slug (sufijo aleatorio de 32 bits: casi nunca pasa)
+SLUG_ATTEMPTS = 3
 
 class PostService:
     @staticmethod
-    def create_post(db: Session, post: PostCreate, author: AuthUser) -> Post:
-        # Crear slug inicial
-        slug = create_slug(post.title)
-        
-        # Crear el post
-        db_post = Post(
-            title=post.title,
-            content=post.content,
-            summary=post.summary or truncate_text(post.content),
-            author_id=author.user_id,
-            author_email=author.email,
-            author_username=author.username,
-            slug=slug,
-            is_published=post.is_published,
-            is_featured=post.is_featured
-        )
-        
-        db.add(db_post)
-        db.commit()
-        db.refresh(db_post)
-        
-        # Actualizar slug con ID
-        db_post.slug = create_slug(post.title, db_post.id)
-        db.commit()
+    async def create_post(db: AsyncSession, post: PostCreate, author: AuthUser) -> Post:
+        for attempt in range(SLUG_ATTEMPTS):
+            # El slug definitivo se conoce antes del INSERT: el post se escribe una sola vez
+            db_post = Post(
+                title=post.title,
+                content=post.content,
+                summary=post.summary or truncate_text(post.content),
+                author_id=author.user_id,
+                author_email=author.email,
+                author_username=author.username,
+                slug=unique_slug(post.title),
+                is_published=post.is_published,
+                is_featured=post.is_featured
+            )
+            
+            db.add(db_post)
+            try:
+                await db.flush()
+                break
+            except IntegrityError:
+                # Slug ya usado: se reintenta con otro sufijo
+                await db.rollback()
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
+        
+        # Indexar para búsqueda
+        await SearchService.index_post(db, db_post)
+        await AuthorStatsService.adjust(db, author.user_id, AuthorStatsService.post_deltas(db_post))
+        await db.commit()
         
         # Limpiar caché
-        RedisService.delete_pattern("posts:*")
+        await RedisService.bump_namespace("posts")
         
         return db_post
     
     @staticmethod
-    def get_posts(
-        db: Session,
-        skip: int = 0,
-        limit: int = 10,
+    def _filter_posts(
+        query,
         published_only: bool = True,
         featured_only: bool = False,
-        author_id: Optional[int] = None,
-        search: Optional[str] = None
-    ) -> List[Post]:
-        query = db.query(Post)
-        
+        author_id: Optional[int] = None
+    ):
         if published_only:
             query = query.filter(Post.is_published == True)
         
@@ -60,80 +73,129 @@ class PostService:
         if author_id:
             query = query.filter(Post.author_id == author_id)
         
+        return query
+    
+    @staticmethod
+    def _posts_query(
+        query,
+        db: AsyncSession,
+        skip: int,
+        limit: int,
+        published_only: bool,
+        featured_only: bool,
+        author_id: Optional[int],
+        search: Optional[str],
+        cursor: Optional[Tuple[datetime, int]]
+    ):
+        query = PostService._filter_posts(query, published_only, featured_only, author_id)
+        
+        rank = None
         if search:
+            query, rank = SearchService.apply_search(query, db, search)
+        
+        # Paginación por cursor (keyset): continúa después de (created_at, id)
+        if cursor:
+            created_at, post_id = cursor
             query = query.filter(
-                Post.title.ilike(f"%{search}%") |
-                Post.content.ilike(f"%{search}%")
+                (Post.created_at < created_at) |
+                ((Post.created_at == created_at) & (Post.id < post_id))
             )
+            skip = 0
+        
+        # Con búsqueda se ordena por relevancia (salvo en modo cursor)
+        order = [desc(Post.created_at), desc(Post.id)]
+        if rank is not None and not cursor:
+            order.insert(0, rank)
         
-        return query.order_by(desc(Post.created_at)).offset(skip).limit(limit).all()
+        return query.order_by(*order).offset(skip).limit(limit)
+    
+    @staticmethod
+    async def get_post_rows(
+        db: AsyncSession,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 10,
+        published_only: bool = True,
+        featured_only: bool = False,
+        author_id: Optional[int] = None,
+        search: Optional[str] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> List[Row]:
+        """Filas con solo las columnas pedidas, en el orden de ``fields``.
+
+        Sin entidades ORM: los listados las convierten directamente en dicts.
+        ``id`` y ``created_at`` se añaden al final si faltan (hacen falta para
+        el cursor).
+        """
+        columns = list(dict.fromkeys([*fields, "id", "created_at"]))
+        query = PostService._posts_query(
+            select(*(getattr(Post, column) for column in columns)), db, skip, limit,
+            published_only, featured_only, author_id, search, cursor
+        )
+        result = await db.execute(query)
+        return result.all()
     
     @staticmethod
-    def get_posts_count(
-        db: Session,
+    async def get_posts_count(
+        db: AsyncSession,
         published_only: bool = True,
         featured_only: bool = False,
         author_id: Optional[int] = None,
         search: Optional[str] = None
     ) -> int:
-        query = db.query(Post)
-        
-        if published_only:
-            query = query.filter(Post.is_published == True)
-        
-        if featured_only:
-            query = query.filter(Post.is_featured == True)
-        
-        if author_id:
-            query = query.filter(Post.author_id == author_id)
+        query = PostService._filter_posts(
+            select(func.count(Post.id)), published_only, featured_only, author_id
+        )
         
         if search:
-            query = query.filter(
-                Post.title.ilike(f"%{search}%") |
-                Post.content.ilike(f"%{search}%")
-            )
+            query, _ = SearchService.apply_search(query, db, search)
         
-        return query.count()
+        return await db.scalar(query)
     
     @staticmethod
-    def get_post_by_id(db: Session, post_id: int) -> Optional[Post]:
-        return db.query(Post).filter(Post.id == post_id).first()
+    async def get_post_by_id(db: AsyncSession, post_id: int) -> Optional[Post]:
+        return await db.get(Post, post_id)
     
     @staticmethod
-    def get_post_by_slug(db: Session, slug: str) -> Optional[Post]:
-        # Intentar obtener del caché
-        cached_post = RedisService.get_cache(f"post:slug:{slug}")
-        if cached_post:
-            return cached_post
-        
-        post = db.query(Post).filter(Post.slug == slug).first()
-        if post:
-            # Incrementar contador de vistas
-            post.view_count += 1
-            db.commit()
-            
-            # Cachear el post
-            RedisService.set_cache(f"post:slug:{slug}", {
-                "id": post.id,
-                "title": post.title,
-                "content": post.content,
-                "author_username": post.author_username,
-                "view_count": post.view_count
-            })
-        
-        return post
+    async def get_post_by_slug(db: AsyncSession, slug: str) -> Optional[Post]:
+        return await db.scalar(select(Post).where(Post.slug == slug))
+    
+    @staticmethod
+    async def get_post_detail(db: AsyncSession, post_id: int) -> Optional[dict]:
+        """Detalle serializado (PostResponse) leído a través de la caché"""
+        return await PostCacheService.get_post(db, post_id)
+    
+    @staticmethod
+    async def get_post_id_by_slug(db: AsyncSession, slug: str) -> Optional[int]:
+        """Id del post por slug sin cargarlo (para leer su versión antes que el detalle)"""
+        return await PostCacheService.resolve_slug(db, slug)
+    
+    @staticmethod
+    async def update_post(db: AsyncSession, post_id: int, post_update: PostUpdate, author: AuthUser) -> Optional[Post]:
+        for attempt in range(SLUG_ATTEMPTS):
+            try:
+                return await PostService._update_post(db, post_id, post_update, author)
+            except IntegrityError:
+                # Slug nuevo ya usado: se repite la actualización con otro sufijo
+                await db.rollback()
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
     
     @staticmethod
-    def update_post(db: Session, post_id: int, post_update: PostUpdate, author: AuthUser) -> Optional[Post]:
-        post = db.query(Post).filter(Post.id == post_id, Post.author_id == author.user_id).first()
+    async def _update_post(db: AsyncSession, post_id: int, post_update: PostUpdate, author: AuthUser) -> Optional[Post]:
+        post = await db.scalar(
+            select(Post).where(Post.id == post_id, Post.author_id == author.user_id)
+        )
         if not post:
             return None
         
         update_data = post_update.dict(exclude_unset=True)
+        old_slug = post.slug
+        old_deltas = AuthorStatsService.post_deltas(post, -1)
         
         # Actualizar slug si cambió el título
-        if "title" in update_data:
-            post.slug = create_slug(update_data["title"], post.id)
+        if "title" in update_data and update_data["title"] != post.title:
+            post.slug = unique_slug(update_data["title"])
         
         # Actualizar summary si cambió el contenido
         if "content" in update_data and "summary" not in update_data:
@@ -142,55 +204,68 @@ class PostService:
         for field, value in update_data.items():
             setattr(post, field, value)
         
-        db.commit()
-        db.refresh(post)
+        if "title" in update_data or "content" in update_data:
+            await SearchService.index_post(db, post)
         
-        # Limpiar caché
-        RedisService.delete_pattern("posts:*")
-        RedisService.delete_cache(f"post:slug:{post.slug}")
+        # Publicado/destacado pueden haber cambiado
+        new_deltas = AuthorStatsService.post_deltas(post)
+        await AuthorStatsService.adjust(db, author.user_id, {
+            field: new_deltas[field] + old_deltas[field] for field in new_deltas
+        })
+        
+        await db.commit()
+        
+        # Limpiar caché (un solo viaje a Redis)
+        pipe = RedisService.pipeline()
+        await RedisService.bump_namespace("posts", pipe)
+        await PostCacheService.invalidate(post.id, slugs=(old_slug, post.slug), pipe=pipe)
+        if not post.is_published:
+            TrendingService.forget(post.id, pipe)
+        await pipe.execute()
         
         return post
     
     @staticmethod
-    def delete_post(db: Session, post_id: int, author: AuthUser) -> bool:
-        post = db.query(Post).filter(Post.id == post_id, Post.author_id == author.user_id).first()
+    async def delete_post(db: AsyncSession, post_id: int, author: AuthUser) -> bool:
+        post = await db.scalar(
+            select(Post)
+            .options(selectinload(Post.comments))
+            .where(Post.id == post_id, Post.author_id == author.user_id)
+        )
         if not post:
             return False
         
         slug = post.slug
-        db.delete(post)
-        db.commit()
-        
-        # Limpiar caché
-        RedisService.delete_pattern("posts:*")
-        RedisService.delete_cache(f"post:slug:{slug}")
+        await SearchService.remove_post(db, post.id)
+        likes = await db.execute(delete(PostLike).where(PostLike.post_id == post.id))
+        await AuthorStatsService.adjust(db, author.user_id, {
+            **AuthorStatsService.post_deltas(post, -1),
+            "total_views": -(post.view_count or 0),
+            "total_likes": -likes.rowcount,
+            "total_comments": -post.comments_count,
+        })
+        await db.delete(post)
+        await db.commit()
+        
+        # Limpiar caché (un solo viaje a Redis)
+        pipe = RedisService.pipeline()
+        await RedisService.bump_namespace("posts", pipe)
+        await PostCacheService.invalidate(post_id, slugs=(slug,), pipe=pipe)
+        LikeStore.forget(post_id, pipe)
+        TrendingService.forget(post_id, pipe)
+        await pipe.execute()
         
         return True
     
     
     @staticmethod
-    def get_user_stats(db: Session, author_id: int) -> dict:
-        from sqlalchemy import case
-        
-        stats = db.query(
-            func.count(Post.id).label('total_posts'),
-            func.sum(case((Post.is_published == True, 1), else_=0)).label('published_posts'),
-            func.sum(case((Post.is_published == False, 1), else_=0)).label('draft_posts'),
-            func.sum(Post.view_count).label('total_views'),
-            func.sum(case((Post.is_featured == True, 1), else_=0)).label('featured_posts')
-        ).filter(Post.author_id == author_id).first()
-        
-        return {
-            "total_posts": stats.total_posts or 0,
-            "published_posts": stats.published_posts or 0,
-            "draft_posts": stats.draft_posts or 0,
-            "total_views": stats.total_views or 0,
-            "featured_posts": stats.featured_posts or 0
-        }
+    async def get_user_stats(db: AsyncSession, author_id: int) -> dict:
+        # Fila mantenida por las escrituras, sin agregar sobre los posts
+        return await AuthorStatsService.get_stats(db, author_id)
 
 class CommentService:
     @staticmethod
-    def create_comment(db: Session, comment: CommentCreate, post_id: int, author: AuthUser) -> Comment:
+    async def create_comment(db: AsyncSession, comment: CommentCreate, post_id: int, author: AuthUser) -> Comment:
         db_comment = Comment(
             content=comment.content,
             post_id=post_id,
@@ -200,50 +275,155 @@ class CommentService:
         )
         
         db.add(db_comment)
-        db.commit()
-        db.refresh(db_comment)
+        
+        # Actualizar contador de comentarios en la misma transacción
+        # (los comentarios nuevos se aprueban por defecto)
+        await CommentService._adjust_comments_count(db, post_id, 1)
+        
+        await db.commit()
+        
+        pipe = RedisService.pipeline()
+        await PostCacheService.invalidate(post_id, pipe=pipe)
+        TrendingService.record(post_id, settings.TRENDING_COMMENT_WEIGHT, pipe)
+        await pipe.execute()
         
         return db_comment
     
     @staticmethod
-    def get_comments_by_post(db: Session, post_id: int) -> List[Comment]:
-        return db.query(Comment).filter(
-            Comment.post_id == post_id,
-            Comment.is_approved == True
-        ).order_by(desc(Comment.created_at)).all()
+    def comments_query(
+        post_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ):
+        """Comentarios aprobados de un post o todos los de un autor, del más nuevo al más antiguo"""
+        query = select(Comment)
+        if post_id is not None:
+            query = query.where(Comment.post_id == post_id, Comment.is_approved == True)
+        if author_id is not None:
+            query = query.where(Comment.author_id == author_id)
+        
+        # Paginación por cursor (keyset): continúa después de (created_at, id)
+        if cursor:
+            created_at, comment_id = cursor
+            query = query.where(
+                (Comment.created_at < created_at) |
+                ((Comment.created_at == created_at) & (Comment.id < comment_id))
+            )
+        return query.order_by(desc(Comment.created_at), desc(Comment.id))
+    
+    @staticmethod
+    async def get_comments_by_post(
+        db: AsyncSession,
+        post_id: int,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> List[Comment]:
+        query = CommentService.comments_query(post_id=post_id, cursor=cursor)
+        result = await db.scalars(query.limit(limit))
+        return result.all()
+    
+    @staticmethod
+    async def get_comments_by_author(
+        db: AsyncSession,
+        author_id: int,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[datetime, int]] = None
+    ) -> List[Comment]:
+        query = CommentService.comments_query(author_id=author_id, cursor=cursor)
+        result = await db.scalars(query.limit(limit))
+        return result.all()
+    
+    @staticmethod
+    async def stream_comments(db: AsyncSession, query) -> AsyncIterator[Comment]:
+        """Recorre los comentarios con un cursor de servidor, por lotes"""
+        result = await db.stream_scalars(
+            query.execution_options(yield_per=settings.COMMENTS_STREAM_BATCH_SIZE)
+        )
+        async for comment in result:
+            yield comment
+            # Los lotes ya enviados no se quedan en el identity map
+            db.expunge(comment)
+    
+    @staticmethod
+    async def get_comment_by_id(db: AsyncSession, comment_id: int) -> Optional[Comment]:
+        return await db.get(Comment, comment_id)
     
     @staticmethod
-    def delete_comment(db: Session, comment_id: int, author: AuthUser) -> bool:
-        comment = db.query(Comment).filter(
+    async def delete_comment(db: AsyncSession, comment_id: int, author: AuthUser) -> bool:
+        comment = await db.scalar(select(Comment).where(
             Comment.id == comment_id,
             Comment.author_id == author.user_id
-        ).first()
+        ))
         
         if not comment:
             return False
         
-        db.delete(comment)
-        db.commit()
+        if comment.is_approved:
+            await CommentService._adjust_comments_count(db, comment.post_id, -1)
+        
+        await db.delete(comment)
+        await db.commit()
+        
+        pipe = RedisService.pipeline()
+        await PostCacheService.invalidate(comment.post_id, pipe=pipe)
+        if comment.is_approved:
+            # Se resta lo que aún vale el comentario, no su peso original
+            weight = decayed(settings.TRENDING_COMMENT_WEIGHT, comment.created_at, time.time())
+            TrendingService.retract(comment.post_id, weight, pipe)
+        await pipe.execute()
         return True
+    
+    @staticmethod
+    async def _adjust_comments_count(db: AsyncSession, post_id: int, delta: int):
+        # UPDATE atómico para no perder incrementos concurrentes
+        await db.execute(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(comments_count=Post.comments_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        await AuthorStatsService.adjust_by_post(
+            db, "total_comments", [{"post_id": post_id, "delta": delta}]
+        )
+    
+    @staticmethod
+    async def reconcile_comments_count(db: AsyncSession) -> int:
+        """Recalcula en bloque el contador de comentarios de todos los posts"""
+        approved_count = select(func.count(Comment.id)).where(
+            Comment.post_id == Post.id,
+            Comment.is_approved == True
+        ).scalar_subquery()
+        
+        result = await db.execute(
+            update(Post)
+            .values(comments_count=approved_count)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
 
 class LikeService:
     @staticmethod
-    def toggle_like(db: Session, post_id: int, user_id: int) -> bool:
-        existing_like = db.query(PostLike).filter(
-            PostLike.post_id == post_id,
-            PostLike.user_id == user_id
-        ).first()
-        
-        if existing_like:
-            db.delete(existing_like)
-            db.commit()
-            return False  # Unlike
-        else:
-            new_like = PostLike(post_id=post_id, user_id=user_id)
-            db.add(new_like)
-            db.commit()
-            return True  # Like
-    
-    @staticmethod
-    def get_likes_count(db: Session, post_id: int) -> int:
-        return db.query(PostLike).filter(PostLike.post_id == post_id).count()
\ No newline at end of file
+    async def toggle_like(db: AsyncSession, post_id: int, user_id: int) -> Tuple[bool, int]:
+        """Alterna el like de forma atómica; devuelve (liked, likes_count)"""
+        return await LikeStore.toggle(db, post_id, user_id)
+    
+    @staticmethod
+    async def get_likes_count(db: AsyncSession, post_id: int) -> int:
+        likes_count, _ = await LikeStore.read(db, post_id)
+        return likes_count
+    
+    @staticmethod
+    async def has_liked(db: AsyncSession, post_id: int, user_id: int) -> bool:
+        _, liked = await LikeStore.read(db, post_id, user_id)
+        return liked
+    
+    @staticmethod
+    async def get_likes_info(db: AsyncSession, post_ids: List[int], user_id: int = 0) -> dict:
+        """{post_id: (likes_count, liked)} para varios posts a la vez"""
+        return await LikeStore.read_many(db, post_ids, user_id)
+    
+    @staticmethod
+    async def get_total_likes_for_author(db: AsyncSession, author_id: int) -> int:
+        stats = await AuthorStatsService.get_stats(db, author_id)
+        return stats["total_likes"]
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Tareas periódicas en segundo plano del microservicio de posts."""
+import asyncio
+import logging
+from typing import Callable, List
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+from posts.auth_service import listen_for_revocations
+from posts.config import settings
+from posts.database import AsyncSessionLocal
+from posts.like_store import LikeStore
+from posts.local_auth import revoked_tokens
+from posts.trending import TrendingService
+from posts.view_counter import ViewCounterService
+
+logger = logging.getLogger(__name__)
+
+
+async def run_job(job: Callable):
+    # Las corrutinas se esperan; las funciones síncronas van al threadpool
+    if asyncio.iscoroutinefunction(job):
+        return await job()
+    return await run_in_threadpool(job)
+
+
+async def run_periodic(interval: float, job: Callable, name: str, immediate: bool = False):
+    """Ejecuta ``job`` cada ``interval`` segundos sin bloquear el event loop"""
+    # Con ``immediate`` la primera ejecución es al arrancar
+    delay = 0 if immediate else interval
+    while True:
+        await asyncio.sleep(delay)
+        delay = interval
+        try:
+            await run_job(job)
+        except Exception:
+            logger.exception("Background task %s failed", name)
+
+
+async def refresh_trending() -> int:
+    """Vuelca lo pendiente y reconstruye el ranking; devuelve los posts puntuados"""
+    # Vistas y likes pendientes en Redis se vuelcan antes de puntuar
+    await ViewCounterService.flush()
+    await LikeStore.flush()
+    async with AsyncSessionLocal() as db:
+        return await TrendingService.rebuild(db)
+
+
+async def rebuild_trending():
+    """Reconstruye el ranking de tendencias si le toca a este worker"""
+    if await TrendingService.claim_rebuild():
+        await refresh_trending()
+
+
+def start_background_tasks(app: FastAPI):
+    tasks: List[asyncio.Task] = [
+        asyncio.create_task(
+            run_periodic(settings.VIEW_FLUSH_INTERVAL, ViewCounterService.flush, "view-flush")
+        ),
+        asyncio.create_task(
+            run_periodic(settings.LIKES_FLUSH_INTERVAL, LikeStore.flush, "like-flush")
+        ),
+        asyncio.create_task(
+            run_periodic(settings.TRENDING_DECAY_INTERVAL, TrendingService.decay, "trending-decay")
+        ),
+        asyncio.create_task(run_periodic(
+            settings.TRENDING_REBUILD_INTERVAL, rebuild_trending, "trending-rebuild",
+            immediate=True
+        )),
+        asyncio.create_task(listen_for_revocations()),
+        # Las revocaciones se guardan en ambos modos de validación
+        asyncio.create_task(
+            run_periodic(60, revoked_tokens.purge_expired, "revocation-purge")
+        ),
+    ]
+    app.state.background_tasks = tasks
+
+
+async def stop_background_tasks(app: FastAPI):
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    await asyncio.gather(*getattr(app.state, "background_tasks", []), return_exceptions=True)
+
+    # Último volcado para no perder las vistas y likes acumulados
+    for name, flush in (("view", ViewCounterService.flush), ("like", LikeStore.flush)):
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Final %s flush failed", name)
@@ -0,0 +1,110 @@
+"""Entorno de pruebas del servicio de posts sin infraestructura.
+
+Igual que ``benchmarks.environment``: Redis se sustituye por fakeredis (con
+``lupa`` para los scripts Lua) y la base de datos es un SQLite temporal
+migrado con Alembic. Tiene que ejecutarse antes de importar cualquier módulo
+de ``posts`` que lea ``settings`` o cree clientes al importarse.
+"""
+import os
+import tempfile
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis
+import redis.asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKDIR = tempfile.mkdtemp(prefix="posts-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'posts.db')}"
+
+_server = fakeredis.FakeServer()
+redis.from_url = lambda *args, decode_responses=False, **kwargs: fakeredis.FakeRedis(
+    server=_server, decode_responses=decode_responses
+)
+# El cliente de posts se crea sobre BlockingConnectionPool.from_url
+redis.asyncio.BlockingConnectionPool.from_url = lambda *args, decode_responses=False, **kwargs: (
+    fakeredis.aioredis.FakeRedis(server=_server, decode_responses=decode_responses).connection_pool
+)
+
+
+def pytest_configure(config):
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(ROOT, "posts", "alembic.ini")), "head")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """Sesión asíncrona; al terminar vacía las tablas, Redis y el estado en memoria"""
+    from sqlalchemy import text
+    from posts import like_store
+    from posts.database import AsyncSessionLocal, Base, async_engine
+    from posts.redis_client import redis_client
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+    async with AsyncSessionLocal() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.execute(text("DELETE FROM post_search"))
+        await session.commit()
+    await redis_client.flushall()
+    like_store._stale_sets.clear()
+
+    # Cada prueba corre en su propio bucle de eventos: no se reutilizan conexiones
+    await redis_client.connection_pool.disconnect()
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def create_post(db):
+    """Inserta un post publicado y devuelve su id"""
+    from sqlalchemy import insert
+    from posts.models import Post
+
+    async def create(**values) -> int:
+        post_id = await db.scalar(insert(Post).values(
+            title=values.pop("title", "Post de prueba"),
+            content=values.pop("content", "contenido"),
+            author_id=values.pop("author_id", 1),
+            author_email="author@example.com",
+            author_username="author",
+            slug=values.pop("slug", None) or f"post-{os.urandom(4).hex()}",
+            is_published=values.pop("is_published", True),
+            **values
+        ).returning(Post.id))
+        await db.commit()
+        return post_id
+
+    return create
+
+
+@pytest.fixture
+async def client(db):
+    """Cliente HTTP contra la aplicación en el mismo proceso (sin lifespan)"""
+    import httpx
+    from posts.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://posts") as client:
+        yield client
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    """Simula una caída de Redis: ningún comando consigue conexión"""
+    from redis.exceptions import ConnectionError
+    from posts.redis_client import redis_client
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis down")
+
+    monkeypatch.setattr(redis_client.connection_pool, "get_connection", unavailable)
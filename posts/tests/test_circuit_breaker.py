@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from posts import auth_service
+from posts.auth_service import AuthService, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth_service.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now += 29.9
+    assert not breaker.allow_request()
+
+    clock.now += 0.1
+    assert breaker.allow_request()
+    # Mientras la prueba está en curso el resto sigue cortado
+    assert not breaker.allow_request()
+
+
+def test_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_trial_failure_reopens_for_a_full_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    # Un solo fallo basta para reabrir, aunque el umbral sea mayor
+    breaker.record_failure()
+
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+
+
+@pytest.mark.anyio
+async def test_open_breaker_skips_auth_service(clock, monkeypatch):
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) <= 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={
+            "valid": True, "user_id": 7, "email": "user@example.com", "username": "user",
+        })
+
+    monkeypatch.setattr(auth_service, "auth_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    monkeypatch.setattr(auth_service, "_http_client", httpx.AsyncClient(
+        base_url="http://users", transport=httpx.MockTransport(handle)
+    ))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as error:
+            await AuthService._validate_remote("token")
+        assert error.value.status_code == 503
+    assert len(calls) == 2
+
+    clock.now += 30
+    user = await AuthService._validate_remote("token")
+
+    assert user.user_id == 7
+    assert len(calls) == 3
+    assert auth_service.auth_breaker.allow_request()
+    await auth_service._http_client.aclose()
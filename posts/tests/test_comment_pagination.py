@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from posts.main import app, get_current_user
+from posts.models import Comment
+from posts.schemas import AuthUser
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+async def insert_comments(db, post_id: int, count: int, author_id: int = 1) -> list:
+    """Inserta ``count`` comentarios, de dos en dos con el mismo created_at"""
+    return (await db.scalars(insert(Comment).returning(Comment.id, sort_by_parameter_order=True), [
+        {
+            "content": f"comentario {index}",
+            "post_id": post_id,
+            "author_id": author_id,
+            "author_email": "author@example.com",
+            "author_username": "author",
+            "is_approved": True,
+            "created_at": START + timedelta(seconds=index // 2),
+        }
+        for index in range(count)
+    ])).all()
+
+
+async def walk(client, path: str, size: int) -> list:
+    """Ids de cada página siguiendo next_cursor hasta el final"""
+    pages, params = [], {"size": size}
+    while True:
+        response = await client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["size"] == size
+        pages.append([item["id"] for item in body["items"]])
+        if body["next_cursor"] is None:
+            return pages
+        params = {"size": size, "cursor": body["next_cursor"]}
+        assert len(pages) < 50, "la paginación no termina"
+
+
+async def test_post_comments_follow_cursor_across_ties(client, db, create_post):
+    post_id = await create_post()
+    other_id = await create_post()
+    ids = await insert_comments(db, post_id, 7)
+    await insert_comments(db, other_id, 2)
+    await db.commit()
+
+    pages = await walk(client, f"/posts/{post_id}/comments", size=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    # Más recientes primero; con el mismo created_at, el id mayor primero
+    assert [comment_id for page in pages for comment_id in page] == sorted(ids, reverse=True)
+
+
+async def test_post_comments_default_to_one_bounded_page(client, db, create_post):
+    post_id = await create_post()
+    await insert_comments(db, post_id, 12)
+    await db.commit()
+
+    body = (await client.get(f"/posts/{post_id}/comments")).json()
+
+    assert len(body["items"]) == 10
+    assert body["next_cursor"] is not None
+
+
+async def test_full_list_mode_is_gone(client, create_post):
+    post_id = await create_post()
+
+    response = await client.get(f"/posts/{post_id}/comments", params={"pagination": "all"})
+
+    assert response.status_code == 422
+
+
+async def test_my_comments_pages(client, db, create_post):
+    post_id = await create_post()
+    ids = await insert_comments(db, post_id, 4, author_id=7)
+    await insert_comments(db, post_id, 3, author_id=8)
+    await db.commit()
+
+    async def current_user():
+        return AuthUser(user_id=7, email="user@example.com", username="user")
+
+    app.dependency_overrides[get_current_user] = current_user
+    try:
+        pages = await walk(client, "/my-comments", size=2)
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+
+    assert pages == [sorted(ids, reverse=True)[:2], sorted(ids, reverse=True)[2:]]
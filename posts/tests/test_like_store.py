@@ -0,0 +1,84 @@
+import pytest
+from redis.exceptions import ConnectionError
+from sqlalchemy import select
+
+from posts.like_store import PENDING_LIKES_KEY, LikeStore, _likes_key
+from posts.models import PostLike
+from posts.redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+async def stored_likes(db, post_id: int) -> set:
+    return set((await db.scalars(
+        select(PostLike.user_id).where(PostLike.post_id == post_id)
+    )).all())
+
+
+async def test_toggle_and_flush_round_trip(db, create_post):
+    post_id = await create_post()
+
+    assert await LikeStore.toggle(db, post_id, 1) == (True, 1)
+    assert await LikeStore.toggle(db, post_id, 2) == (True, 2)
+    assert await LikeStore.read(db, post_id, 1) == (2, True)
+    # Los likes solo están en Redis hasta el volcado
+    assert await stored_likes(db, post_id) == set()
+
+    assert await LikeStore.flush() == 2
+    assert await stored_likes(db, post_id) == {1, 2}
+    assert not await redis_client.exists(PENDING_LIKES_KEY)
+
+    assert await LikeStore.toggle(db, post_id, 1) == (False, 1)
+    assert await LikeStore.flush() == 1
+    assert await stored_likes(db, post_id) == {2}
+
+    # Sin el set en Redis se recarga desde la base de datos
+    await redis_client.delete(_likes_key(post_id))
+    assert await LikeStore.read(db, post_id, 1) == (1, False)
+    assert await LikeStore.read(db, post_id, 2) == (1, True)
+
+
+async def test_repeated_toggles_flush_final_state(db, create_post):
+    post_id = await create_post()
+
+    for _ in range(3):
+        await LikeStore.toggle(db, post_id, 1)
+
+    assert await LikeStore.flush() == 1
+    assert await stored_likes(db, post_id) == {1}
+    assert await LikeStore.flush() == 0
+
+
+async def test_missing_post_creates_no_set(db):
+    assert await LikeStore.read(db, 4242, 1) == (0, False)
+    assert await LikeStore.toggle(db, 4242, 1) == (False, 0)
+    assert await LikeStore.read_many(db, [4242]) == {4242: (0, False)}
+    assert not await redis_client.exists(_likes_key(4242))
+    assert not await redis_client.exists(PENDING_LIKES_KEY)
+
+
+async def test_sets_expire_and_are_renewed_on_access(db, create_post):
+    post_id = await create_post()
+
+    await LikeStore.read(db, post_id)
+    await redis_client.expire(_likes_key(post_id), 5)
+    await LikeStore.toggle(db, post_id, 1)
+
+    assert await redis_client.ttl(_likes_key(post_id)) > 5
+
+
+async def test_toggle_without_redis_drops_stale_set(db, create_post, monkeypatch):
+    post_id = await create_post()
+    await LikeStore.toggle(db, post_id, 1)
+    await LikeStore.flush()
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(redis_client, "eval", unavailable)
+        assert await LikeStore.toggle(db, post_id, 2) == (True, 2)
+
+    # El set cargado antes del corte no incluye el like escrito en la base de datos
+    assert await stored_likes(db, post_id) == {1, 2}
+    assert await LikeStore.read(db, post_id, 2) == (2, True)
@@ -0,0 +1,34 @@
+import pytest
+
+from posts.redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_detail_is_cached_with_validators(client, create_post):
+    post_id = await create_post(title="Con caché")
+
+    first = await client.get(f"/posts/{post_id}")
+    second = await client.get(f"/posts/{post_id}", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert "last-modified" in first.headers
+    assert second.status_code == 304
+    assert await redis_client.exists(f"post:id:{post_id}")
+
+
+async def test_detail_without_redis_reads_the_database(client, create_post, redis_down):
+    post_id = await create_post(title="Sin Redis", slug="sin-redis")
+
+    by_id = await client.get(f"/posts/{post_id}", params={"include": "comments"})
+    by_slug = await client.get("/posts/slug/sin-redis")
+
+    for response in (by_id, by_slug):
+        assert response.status_code == 200
+        assert response.json()["title"] == "Sin Redis"
+        # Sin versión no hay validadores propios de la caché
+        assert "last-modified" not in response.headers
+    # La vista de la primera petición se escribió directamente en la base de datos
+    assert by_slug.json()["view_count"] == 1
+    assert (await client.get("/posts/slug/no-existe")).status_code == 404
+    assert (await client.get("/posts/4242")).status_code == 404
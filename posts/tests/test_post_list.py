@@ -0,0 +1,26 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_feed_page_is_cached(client, create_post):
+    post_id = await create_post(title="En caché")
+
+    first = await client.get("/posts")
+    await create_post(title="Nuevo sin invalidar")  # insertado por detrás de la caché
+    second = await client.get("/posts")
+
+    assert first.json() == second.json()
+    assert [item["id"] for item in first.json()["items"]] == [post_id]
+
+
+async def test_feed_without_redis_reads_the_database(client, create_post, redis_down):
+    post_id = await create_post(title="Sin Redis")
+
+    response = await client.get("/posts", params={"with_likes": True})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert [item["id"] for item in body["items"]] == [post_id]
+    assert body["items"][0]["likes_count"] == 0
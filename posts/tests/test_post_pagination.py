@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from posts.utils import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+async def walk(client, path: str, size: int, **params) -> list:
+    """Recorre todas las páginas; devuelve los ids de cada página"""
+    pages, cursor = [], None
+    while True:
+        query = {"pagination": "cursor", "size": size, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = await client.get(path, params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+        assert len(pages) < 50, "la paginación no termina"
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 8, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "no-es-un-cursor", encode_cursor(START, 1)[:-3] + "!!!"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+async def test_posts_pages_cover_ties_without_gaps(client, create_post):
+    # Cinco posts con el mismo created_at: el id desempata
+    ids = [await create_post(created_at=START) for _ in range(5)]
+    ids += [await create_post(created_at=START - timedelta(minutes=1)) for _ in range(2)]
+
+    pages = await walk(client, "/posts", size=2)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    expected = sorted(ids[:5], reverse=True) + sorted(ids[5:], reverse=True)
+    assert [post_id for page in pages for post_id in page] == expected
+
+
+@pytest.mark.parametrize("total, sizes", [(4, [4]), (5, [4, 1]), (8, [4, 4])])
+async def test_posts_last_page_has_no_cursor(client, create_post, total, sizes):
+    for index in range(total):
+        await create_post(created_at=START + timedelta(seconds=index))
+
+    pages = await walk(client, "/posts", size=4)
+
+    assert [len(page) for page in pages] == sizes
+
+
+async def test_empty_feed_has_no_cursor(client, db):
+    assert await walk(client, "/posts", size=3) == [[]]
+
+
+async def test_cursor_keeps_filters_across_pages(client, create_post):
+    await create_post(is_published=False, is_featured=True, created_at=START + timedelta(hours=1))
+    featured = [
+        await create_post(is_featured=True, created_at=START + timedelta(seconds=index))
+        for index in range(3)
+    ]
+    await create_post(created_at=START + timedelta(minutes=1))
+
+    pages = await walk(client, "/posts", size=2, featured_only=True)
+
+    newest_first = featured[::-1]
+    assert pages == [newest_first[:2], newest_first[2:]]
+
+
+async def test_invalid_cursor_is_rejected(client):
+    response = await client.get("/posts", params={"pagination": "cursor", "cursor": "roto"})
+    assert response.status_code == 400
@@ -0,0 +1,32 @@
+import pytest
+
+from posts.main import app, get_current_user
+from posts.schemas import AuthUser
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def author():
+    async def current_user():
+        return AuthUser(user_id=1, email="author@example.com", username="author")
+
+    app.dependency_overrides[get_current_user] = current_user
+    yield
+    app.dependency_overrides.pop(get_current_user)
+
+
+async def test_update_response_includes_pending_views(client, author):
+    created = await client.post("/posts", json={"title": "Vistas", "content": "texto", "is_published": True})
+    post_id = created.json()["id"]
+    assert created.json()["view_count"] == 0
+
+    for _ in range(5):
+        await client.get(f"/posts/{post_id}")
+
+    updated = await client.put(f"/posts/{post_id}", json={"content": "otro texto"})
+    detail = await client.get(f"/posts/{post_id}")
+
+    assert updated.status_code == 200
+    assert updated.json()["view_count"] == 5
+    assert detail.json()["view_count"] == 6
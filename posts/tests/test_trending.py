@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from posts.config import settings
+from posts.like_store import LikeStore
+from posts.models import PostLike
+from posts.redis_client import redis_client
+from posts.tasks import rebuild_trending, refresh_trending
+from posts.trending import TRENDING_KEY
+
+pytestmark = pytest.mark.anyio
+
+WEIGHT = settings.TRENDING_LIKE_WEIGHT
+
+
+async def score(post_id: int) -> float:
+    return await redis_client.zscore(TRENDING_KEY, post_id)
+
+
+async def test_unlike_before_flush_retracts_full_weight(db, create_post):
+    post_id = await create_post()
+    await redis_client.zadd(TRENDING_KEY, {post_id: 100})
+
+    await LikeStore.toggle(db, post_id, 1)
+    assert await score(post_id) == 100 + WEIGHT
+
+    await LikeStore.toggle(db, post_id, 1)
+    assert await score(post_id) == pytest.approx(100)
+
+
+async def test_unlike_of_old_like_retracts_decayed_weight(db, create_post):
+    post_id = await create_post()
+    await LikeStore.toggle(db, post_id, 1)
+    await LikeStore.flush()
+
+    # Like de hace una vida media: en el ranking ya solo vale la mitad
+    liked_at = datetime.fromtimestamp(time.time() - settings.TRENDING_HALF_LIFE, tz=timezone.utc)
+    await db.execute(update(PostLike).where(PostLike.post_id == post_id).values(created_at=liked_at))
+    await db.commit()
+    await redis_client.zadd(TRENDING_KEY, {post_id: 100 + WEIGHT / 2})
+
+    await LikeStore.toggle(db, post_id, 1)
+
+    assert await score(post_id) == pytest.approx(100, abs=0.01)
+
+
+async def test_retract_never_goes_below_zero(db, create_post):
+    post_id = await create_post()
+    await LikeStore.toggle(db, post_id, 1)
+    await redis_client.zadd(TRENDING_KEY, {post_id: 1})
+
+    await LikeStore.toggle(db, post_id, 1)
+    assert await score(post_id) == 0
+
+    # Un post fuera del ranking no entra con puntuación negativa
+    other_id = await create_post()
+    await LikeStore.toggle(db, other_id, 1)
+    await redis_client.zrem(TRENDING_KEY, other_id)
+    await LikeStore.toggle(db, other_id, 1)
+    assert await score(other_id) is None
+
+
+async def test_refresh_flushes_pending_likes_before_scoring(db, create_post):
+    post_id = await create_post()
+    await LikeStore.toggle(db, post_id, 1)
+    await redis_client.delete(TRENDING_KEY)
+
+    assert await refresh_trending() == 1
+
+    assert await score(post_id) == pytest.approx(WEIGHT, rel=0.01)
+
+
+async def test_periodic_rebuild_runs_once_per_interval(db, create_post):
+    post_id = await create_post()
+    await LikeStore.toggle(db, post_id, 1)
+
+    await rebuild_trending()
+    await redis_client.zadd(TRENDING_KEY, {post_id: 1})
+    await rebuild_trending()  # Otro worker en el mismo intervalo no reconstruye
+
+    assert await score(post_id) == 1
@@ -0,0 +1,198 @@
+"""Feed de tendencias con puntuación que decae con el tiempo.
+
+La puntuación de cada post vive en el sorted set ``posts:trending``. Cada
+vista, like o comentario suma su peso al momento (ZINCRBY) y una tarea
+periódica multiplica todo el set por ``0.5 ** (transcurrido / vida_media)``,
+así que un evento pesa la mitad cada ``TRENDING_HALF_LIFE`` segundos. El
+decaimiento usa el tiempo transcurrido desde el último aplicado (guardado en
+Redis), de modo que con varios workers se aplica una sola vez.
+
+Servir una página es un ZREVRANGE (O(log N + M)) más una consulta por clave
+primaria de esos posts. La reconstrucción recalcula el set desde la base de
+datos con los contadores de los posts recientes.
+"""
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.config import settings
+from posts.models import Post, PostLike
+from posts.redis_client import redis_client
+
+TRENDING_KEY = "posts:trending"
+DECAYED_AT_KEY = "posts:trending:decayed_at"
+REBUILD_LOCK_KEY = "posts:trending:rebuild"
+
+# Decae el set según el tiempo desde el último decaimiento y poda la cola
+DECAY_SCRIPT = """
+local now = tonumber(ARGV[1])
+local last = redis.call("get", KEYS[2])
+if not last then
+    redis.call("set", KEYS[2], ARGV[1])
+    return 0
+end
+last = tonumber(last)
+if now - last < tonumber(ARGV[3]) then
+    return 0
+end
+redis.call("set", KEYS[2], ARGV[1])
+if redis.call("exists", KEYS[1]) == 0 then
+    return 0
+end
+local factor = math.pow(0.5, (now - last) / tonumber(ARGV[2]))
+redis.call("zunionstore", KEYS[1], 1, KEYS[1], "WEIGHTS", factor)
+redis.call("zremrangebyscore", KEYS[1], "-inf", "(" .. ARGV[4])
+redis.call("zremrangebyrank", KEYS[1], 0, -tonumber(ARGV[5]) - 1)
+return 1
+"""
+
+# Resta el peso sin bajar de 0; si el post ya no está en el ranking no hace nada
+RETRACT_SCRIPT = """
+local score = redis.call("zscore", KEYS[1], ARGV[2])
+if not score then
+    return 0
+end
+redis.call("zadd", KEYS[1], math.max(tonumber(score) - tonumber(ARGV[1]), 0), ARGV[2])
+return 1
+"""
+
+posts_table = Post.__table__
+
+likes_per_post = (
+    select(func.count(PostLike.id))
+    .where(PostLike.post_id == posts_table.c.id)
+    .correlate(posts_table)
+    .scalar_subquery()
+)
+
+
+def decayed(weight: float, created_at: Optional[datetime], now: float) -> float:
+    """Peso de un evento ocurrido en ``created_at`` visto desde ``now``"""
+    if created_at is None:
+        return weight
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite guarda UTC sin zona
+    age = max(now - created_at.timestamp(), 0)
+    return weight * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+class TrendingService:
+    @staticmethod
+    def record(post_id: int, weight: float, pipe):
+        """Encola la suma de ``weight`` a la puntuación del post"""
+        pipe.zincrby(TRENDING_KEY, weight, post_id)
+
+    @staticmethod
+    def retract(post_id: int, weight: float, pipe):
+        """Encola la resta de ``weight`` (like retirado, comentario borrado)
+
+        Quien llama pasa lo que aún vale el evento (su peso decaído); el
+        recorte a 0 cubre eventos que la reconstrucción ya no contaba.
+        """
+        pipe.eval(RETRACT_SCRIPT, 1, TRENDING_KEY, weight, post_id)
+
+    @staticmethod
+    def forget(post_id: int, pipe):
+        """Encola la salida del post del ranking (borrado o despublicado)"""
+        pipe.zrem(TRENDING_KEY, post_id)
+
+    @staticmethod
+    async def get_page(start: int, size: int) -> Tuple[List[int], int]:
+        """Ids de la página (de mayor a menor puntuación) y total del ranking"""
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrevrange(TRENDING_KEY, start, start + size - 1)
+        pipe.zcard(TRENDING_KEY)
+        post_ids, total = await pipe.execute()
+        return [int(post_id) for post_id in post_ids], total
+
+    @staticmethod
+    async def get_rows(db: AsyncSession, post_ids: List[int], fields: Sequence[str]) -> List[Row]:
+        """Filas publicadas de ``post_ids`` en ese orden, con las columnas de ``fields``"""
+        if not post_ids:
+            return []
+        columns = list(dict.fromkeys([*fields, "id", "created_at"]))
+        rows = (await db.execute(
+            select(*(posts_table.c[column] for column in columns))
+            .where(posts_table.c.id.in_(post_ids), posts_table.c.is_published == True)
+        )).all()
+        by_id = {row.id: row for row in rows}
+        return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+    @staticmethod
+    async def get_feed(
+        db: AsyncSession, start: int, size: int, fields: Sequence[str]
+    ) -> Tuple[List[Row], int]:
+        """Página del ranking ya resuelta a filas y total del ranking"""
+        post_ids, total = await TrendingService.get_page(start, size)
+        rows = await TrendingService.get_rows(db, post_ids, fields)
+
+        # Borrados o despublicados que siguen en el ranking
+        stale = set(post_ids) - {row.id for row in rows}
+        if stale:
+            await redis_client.zrem(TRENDING_KEY, *stale)
+        return rows, total
+
+    @staticmethod
+    async def decay() -> bool:
+        """Aplica el decaimiento pendiente (idempotente entre workers)"""
+        return bool(await redis_client.eval(
+            DECAY_SCRIPT, 2, TRENDING_KEY, DECAYED_AT_KEY,
+            time.time(),
+            settings.TRENDING_HALF_LIFE,
+            settings.TRENDING_DECAY_INTERVAL / 2,
+            settings.TRENDING_MIN_SCORE,
+            settings.TRENDING_MAX_SIZE,
+        ))
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, batch_size: int = 500) -> int:
+        """Recalcula el ranking con los posts publicados dentro de la ventana"""
+        now = time.time()
+        since = datetime.fromtimestamp(now - settings.TRENDING_WINDOW, tz=timezone.utc)
+        result = await db.stream(
+            select(
+                posts_table.c.id,
+                posts_table.c.created_at,
+                posts_table.c.view_count,
+                posts_table.c.comments_count,
+                likes_per_post,
+            )
+            .where(posts_table.c.is_published == True, posts_table.c.created_at >= since)
+            .execution_options(yield_per=batch_size)
+        )
+
+        # Se construye aparte y se sustituye de golpe con RENAME
+        build_key = f"{TRENDING_KEY}:build"
+        await redis_client.delete(build_key)
+        ranked = 0
+        async for rows in result.partitions():
+            scores = {}
+            for post_id, created_at, views, comments, likes in rows:
+                raw = (
+                    (views or 0) * settings.TRENDING_VIEW_WEIGHT
+                    + likes * settings.TRENDING_LIKE_WEIGHT
+                    + (comments or 0) * settings.TRENDING_COMMENT_WEIGHT
+                )
+                score = decayed(raw, created_at, now)
+                if score >= settings.TRENDING_MIN_SCORE:
+                    scores[post_id] = score
+            if scores:
+                await redis_client.zadd(build_key, scores)
+                ranked += len(scores)
+
+        pipe = redis_client.pipeline(transaction=True)
+        if ranked:
+            pipe.zremrangebyrank(build_key, 0, -settings.TRENDING_MAX_SIZE - 1)
+            pipe.rename(build_key, TRENDING_KEY)
+        else:
+            pipe.delete(TRENDING_KEY)
+        pipe.set(DECAYED_AT_KEY, now)
+        await pipe.execute()
+        return min(ranked, settings.TRENDING_MAX_SIZE)
+
+    @staticmethod
+    async def claim_rebuild() -> bool:
+        """True para un solo worker por intervalo de reconstrucción"""
+        interval = int(settings.TRENDING_REBUILD_INTERVAL)
+        return bool(await redis_client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=max(interval - 1, 1)))
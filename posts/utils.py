@@ -1,15 +1,32 @@
 import re
-from typing import Optional
+import json
+import base64
+import secrets
+import orjson
+from datetime import datetime
+from typing import Optional, Tuple
 
-def create_slug(title: str, post_id: Optional[int] = None) -> str:
-    """Crea un slug único para el post"""
+# Fechas UTC con "Z", igual que las serializa pydantic
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+SLUG_MAX_LENGTH = 100
+SLUG_SUFFIX_BYTES = 4
+
+def create_slug(title: str, suffix: Optional[str] = None) -> str:
+    """Crea el slug del post a partir del título (y ``suffix`` si se indica)"""
     slug = re.sub(r'[^a-zA-Z0-9\s-]', '', title.lower())
     slug = re.sub(r'\s+', '-', slug).strip('-')
     
-    if post_id:
-        slug = f"{slug}-{post_id}"
+    if suffix:
+        # Se recorta el título, nunca el sufijo que hace único el slug
+        slug = slug[:SLUG_MAX_LENGTH - len(suffix) - 1].rstrip('-')
+        return f"{slug}-{suffix}" if slug else suffix
     
-    return slug[:100]  # Limitar longitud
+    return slug[:SLUG_MAX_LENGTH]  # Limitar longitud
+
+def unique_slug(title: str) -> str:
+    """Slug con sufijo aleatorio: se conoce antes del INSERT y el índice único descarta colisiones"""
+    return create_slug(title, secrets.token_hex(SLUG_SUFFIX_BYTES))
 
 def truncate_text(text: str, max_length: int = 150) -> str:
     """Trunca el texto para resúmenes"""
@@ -17,4 +34,23 @@ def truncate_text(text: str, max_length: int = 150) -> str:
         return text
     
     truncated = text[:max_length].rsplit(' ', 1)[0]
-    return f"{truncated}..."
\ No newline at end of file
+    return f"{truncated}..."
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Codifica la posición (created_at, id) como un cursor opaco"""
+    raw = json.dumps({"c": created_at.isoformat(), "i": row_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica un cursor opaco; lanza ValueError si es inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def dumps_json(value) -> bytes:
+    """Serializa a JSON con orjson (datetimes incluidos)"""
+    return orjson.dumps(value, option=JSON_OPTIONS)
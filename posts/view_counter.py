@@ -0,0 +1,181 @@
+"""Contador de vistas con escritura diferida.
+
+Cada lectura solo hace un ``HINCRBY`` en Redis (junto con la suma al ranking
+de tendencias, en el mismo viaje); un proceso en segundo plano
+vuelca periódicamente los incrementos acumulados a ``posts.view_count`` con
+un único UPDATE por lotes.
+
+El contador ya volcado de cada post se refleja en ``post:views:{id}``: se
+siembra al leer el post de la base de datos y el volcado lo incrementa, así
+que el detalle y las páginas cacheadas muestran el valor actual sin
+invalidarse cada vez que se vuelcan vistas. ``posts:views:epoch`` cambia con
+cada volcado y evita sembrar un valor leído antes de uno.
+"""
+import uuid
+from typing import Dict, Iterable
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import bindparam, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from posts.author_stats import AuthorStatsService
+from posts.config import settings
+from posts.database import AsyncSessionLocal
+from posts.models import Post
+from posts.redis_client import redis_client
+from posts.trending import TrendingService
+
+# Hash de Redis con los incrementos pendientes: {post_id: delta}
+PENDING_VIEWS_KEY = "posts:views:pending"
+FLUSH_EPOCH_KEY = "posts:views:epoch"
+
+# KEYS: época y contadores; ARGV: época leída antes de la consulta, TTL y valores.
+# Los contadores existentes solo renuevan el TTL; los nuevos se crean si no hubo volcado
+SEED_TOTALS_SCRIPT = """
+local fresh = (redis.call("get", KEYS[1]) or "") == ARGV[1]
+for i = 2, #KEYS do
+    if redis.call("expire", KEYS[i], ARGV[2]) == 0 and fresh then
+        redis.call("set", KEYS[i], ARGV[i + 1], "EX", ARGV[2])
+    end
+end
+return 1
+"""
+
+# KEYS: época y contadores; ARGV: incrementos ya escritos en la base de datos
+APPLY_FLUSH_SCRIPT = """
+for i = 2, #KEYS do
+    if redis.call("exists", KEYS[i]) == 1 then
+        redis.call("incrby", KEYS[i], ARGV[i - 1])
+    end
+end
+return redis.call("incr", KEYS[1])
+"""
+
+posts_table = Post.__table__
+
+apply_view_deltas = (
+    posts_table.update()
+    .where(posts_table.c.id == bindparam("post_id"))
+    .values(view_count=func.coalesce(posts_table.c.view_count, 0) + bindparam("delta"))
+)
+
+
+def view_total_key(post_id: int) -> str:
+    return f"post:views:{post_id}"
+
+
+class ViewCounterService:
+    @staticmethod
+    async def record_view(db: AsyncSession, post_id: int):
+        """Registra una vista sin escribir en la base de datos"""
+        try:
+            # MULTI: si falla, no queda nada a medias antes de ir a la base de datos
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hincrby(PENDING_VIEWS_KEY, post_id, 1)
+            TrendingService.record(post_id, settings.TRENDING_VIEW_WEIGHT, pipe)
+            await pipe.execute()
+        except RedisError:
+            # Sin Redis se vuelve al incremento directo
+            rows = [{"post_id": post_id, "delta": 1}]
+            await db.execute(apply_view_deltas, rows)
+            await AuthorStatsService.adjust_by_post(db, "total_views", rows)
+            await db.commit()
+
+    @staticmethod
+    async def get_pending(post_ids: Iterable[int]) -> Dict[int, int]:
+        """Incrementos aún no volcados para los posts indicados"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        try:
+            values = await redis_client.hmget(PENDING_VIEWS_KEY, post_ids)
+        except RedisError:
+            return {}
+        return {
+            post_id: int(value)
+            for post_id, value in zip(post_ids, values)
+            if value
+        }
+
+    @staticmethod
+    async def get_epoch() -> str:
+        """Época de volcado; se lee antes de consultar los contadores en la base de datos"""
+        try:
+            return await redis_client.get(FLUSH_EPOCH_KEY) or ""
+        except RedisError:
+            return ""
+
+    @staticmethod
+    async def seed_totals(counts: Dict[int, int], epoch: str):
+        """Refleja en Redis los ``view_count`` recién leídos de la base de datos"""
+        if not counts:
+            return
+        try:
+            await redis_client.eval(
+                SEED_TOTALS_SCRIPT, len(counts) + 1,
+                FLUSH_EPOCH_KEY, *(view_total_key(post_id) for post_id in counts),
+                epoch, settings.POST_CACHE_TTL, *counts.values()
+            )
+        except RedisError:
+            pass  # Se usa el valor de la base de datos
+
+    @staticmethod
+    async def get_counts(counts: Dict[int, int]) -> Dict[int, int]:
+        """Vistas actuales: el contador volcado (o ``counts`` si no está en Redis) más lo pendiente"""
+        post_ids = list(counts)
+        if not post_ids:
+            return {}
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.mget([view_total_key(post_id) for post_id in post_ids])
+            pipe.hmget(PENDING_VIEWS_KEY, post_ids)
+            totals, pending = await pipe.execute()
+        except RedisError:
+            return dict(counts)
+        return {
+            post_id: int(total if total is not None else counts[post_id]) + int(delta or 0)
+            for post_id, total, delta in zip(post_ids, totals, pending)
+        }
+
+    @staticmethod
+    async def flush() -> int:
+        """Vuelca los incrementos pendientes a la base de datos"""
+        # RENAME es atómico: las vistas nuevas se acumulan en un hash limpio
+        # y solo un worker se queda con el lote actual
+        batch_key = f"{PENDING_VIEWS_KEY}:flush:{uuid.uuid4().hex}"
+        try:
+            await redis_client.rename(PENDING_VIEWS_KEY, batch_key)
+        except ResponseError:
+            return 0  # No hay vistas pendientes
+
+        deltas = await redis_client.hgetall(batch_key)
+        rows = [
+            {"post_id": int(post_id), "delta": int(delta)}
+            for post_id, delta in deltas.items()
+            if int(delta)
+        ]
+
+        try:
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(apply_view_deltas, rows)
+                    await AuthorStatsService.adjust_by_post(db, "total_views", rows)
+                    await db.commit()
+        except Exception:
+            # Devolver los incrementos para el siguiente intento
+            pipe = redis_client.pipeline(transaction=False)
+            for row in rows:
+                pipe.hincrby(PENDING_VIEWS_KEY, row["post_id"], row["delta"])
+            pipe.delete(batch_key)
+            await pipe.execute()
+            raise
+
+        # Los contadores reflejados suben lo mismo que la base de datos
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(batch_key)
+        if rows:
+            pipe.eval(
+                APPLY_FLUSH_SCRIPT, len(rows) + 1,
+                FLUSH_EPOCH_KEY, *(view_total_key(row["post_id"]) for row in rows),
+                *(row["delta"] for row in rows)
+            )
+        await pipe.execute()
+        return len(rows)
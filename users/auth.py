@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from functools import lru_cache
+from typing import Dict, Optional
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from cryptography.hazmat.primitives import serialization
 from users.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -13,6 +15,38 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _signing_params() -> dict:
+    if settings.JWT_PRIVATE_KEY:
+        return {
+            "key": settings.JWT_PRIVATE_KEY,
+            "algorithm": "RS256",
+            "headers": {"kid": settings.JWT_KEY_ID}
+        }
+    return {"key": settings.SECRET_KEY, "algorithm": settings.ALGORITHM}
+
+@lru_cache
+def get_public_keys() -> Dict[str, str]:
+    """Claves públicas PEM vigentes por kid (vacío si se firma con HS256)"""
+    if not settings.JWT_PRIVATE_KEY:
+        return {}
+    private_key = serialization.load_pem_private_key(
+        settings.JWT_PRIVATE_KEY.encode(), password=None
+    )
+    current = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return {**settings.JWT_PREVIOUS_PUBLIC_KEYS, settings.JWT_KEY_ID: current}
+
+def get_jwks() -> dict:
+    """Conjunto de claves públicas en formato JWKS"""
+    keys = []
+    for kid, pem in get_public_keys().items():
+        key = jwk.construct(pem, "RS256").to_dict()
+        key.update({"kid": kid, "use": "sig", "alg": "RS256"})
+        keys.append(key)
+    return {"keys": keys}
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -20,18 +54,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, **_signing_params())
     return encoded_jwt
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, **_signing_params())
     return encoded_jwt
 
 def verify_token(token: str):
     try:
+        if settings.JWT_PRIVATE_KEY:
+            kid = jwt.get_unverified_header(token).get("kid", settings.JWT_KEY_ID)
+            public_key = get_public_keys().get(kid)
+            if public_key is None:
+                return None
+            return jwt.decode(token, public_key, algorithms=["RS256"])
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # Database
@@ -8,10 +8,19 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://users-redis:6379"
     REDIS_TTL: int = 3600  # 1 hora
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0  # segundos de espera por una conexión libre del pool
+    AUTH_REVOCATION_CHANNEL: str = "auth:revocations"
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
+    # Firma asimétrica opcional (RS256): clave privada PEM actual y su kid.
+    # Las claves públicas anteriores ({kid: PEM}) se siguen publicando en
+    # /.well-known/jwks.json durante la rotación.
+    JWT_PRIVATE_KEY: Optional[str] = None
+    JWT_KEY_ID: str = "default"
+    JWT_PREVIOUS_PUBLIC_KEYS: Dict[str, str] = {}
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
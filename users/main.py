@@ -1,19 +1,17 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from users.config import settings
-from users.database import get_db, engine
-from users.models import Base, User
+from users.database import get_db
+from users.models import User
 from users.schemas import *
 from users.services import UserService
-from users.auth import create_access_token, create_refresh_token, verify_token
-from users.redis_client import RedisService
-
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+from users.auth import create_access_token, create_refresh_token, verify_token, get_jwks
+from users.redis_client import RedisService, redis_client
 
 app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
 
@@ -31,11 +29,29 @@ app.add_middleware(
 )
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+@app.on_event("shutdown")
+async def on_shutdown():
+    await redis_client.aclose()
+
+def _token_entries(user: User, access_token: str, refresh_token: str):
+    return [
+        (f"access:{access_token}", {
+            "user_id": user.id,
+            "email": user.email,
+            "type": "access"
+        }, settings.REDIS_TTL),
+        (f"refresh:{refresh_token}", {
+            "user_id": user.id,
+            "email": user.email,
+            "type": "refresh"
+        }, settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600),
+    ]
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     token = credentials.credentials
     
     # Verificar si el token está en blacklist
-    if RedisService.is_token_blacklisted(token):
+    if await RedisService.is_token_blacklisted(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked"
@@ -61,7 +77,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Invalid token payload"
         )
     
-    user = UserService.get_user_by_email(db, email)
+    user = await run_in_threadpool(UserService.get_user_by_email, db, email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -75,8 +91,11 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     return UserService.create_user(db, user)
 
 @app.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = UserService.authenticate_user(db, user_credentials.email, user_credentials.password)
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    # bcrypt y la consulta son bloqueantes
+    user = await run_in_threadpool(
+        UserService.authenticate_user, db, user_credentials.email, user_credentials.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,21 +104,13 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "username": user.username},
+        expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(data={"sub": user.email})
     
     # Guardar tokens en Redis
-    RedisService.set_token(f"access:{access_token}", {
-        "user_id": user.id,
-        "email": user.email,
-        "type": "access"
-    })
-    RedisService.set_token(f"refresh:{refresh_token}", {
-        "user_id": user.id,
-        "email": user.email,
-        "type": "refresh"
-    }, ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+    await RedisService.set_tokens(_token_entries(user, access_token, refresh_token))
     
     return {
         "access_token": access_token,
@@ -108,14 +119,14 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @app.post("/validate-token", response_model=ValidateTokenResponse)
-def validate_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
+async def validate_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
     """
     Endpoint para que otros servicios validen tokens JWT
     """
     token = request.token
     
     # Verificar si el token está en blacklist
-    if RedisService.is_token_blacklisted(token):
+    if await RedisService.is_token_blacklisted(token):
         return ValidateTokenResponse(
             valid=False,
             message="Token has been revoked"
@@ -141,7 +152,7 @@ def validate_token(request: ValidateTokenRequest, db: Session = Depends(get_db))
             message="Invalid token payload"
         )
     
-    user = UserService.get_user_by_email(db, email)
+    user = await run_in_threadpool(UserService.get_user_by_email, db, email)
     if user is None:
         return ValidateTokenResponse(
             valid=False,
@@ -155,6 +166,13 @@ def validate_token(request: ValidateTokenRequest, db: Session = Depends(get_db))
         username=user.username
     )
 
+@app.get("/.well-known/jwks.json")
+def get_jwks_keys():
+    """
+    Claves públicas para que otros servicios verifiquen tokens localmente
+    """
+    return get_jwks()
+
 @app.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
@@ -168,7 +186,7 @@ def update_current_user(
     return UserService.update_user(db, current_user.id, user_update)
 
 @app.post("/logout")
-def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     
     # Agregar token a blacklist
@@ -179,12 +197,12 @@ def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
             import time
             ttl = exp - int(time.time())
             if ttl > 0:
-                RedisService.blacklist_token(token, ttl)
+                await RedisService.blacklist_token(token, ttl)
     
     return {"message": "Successfully logged out"}
 
 @app.post("/refresh", response_model=Token)
-def refresh_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
     token = request.token
     
     payload = verify_token(token)
@@ -201,7 +219,7 @@ def refresh_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
         )
     
     email = payload.get("sub")
-    user = UserService.get_user_by_email(db, email)
+    user = await run_in_threadpool(UserService.get_user_by_email, db, email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -211,24 +229,16 @@ def refresh_token(request: ValidateTokenRequest, db: Session = Depends(get_db)):
     # Crear nuevos tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "username": user.username},
+        expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(data={"sub": user.email})
     
-    # Blacklist el token anterior
-    RedisService.blacklist_token(token)
-    
-    # Guardar nuevos tokens en Redis
-    RedisService.set_token(f"access:{access_token}", {
-        "user_id": user.id,
-        "email": user.email,
-        "type": "access"
-    })
-    RedisService.set_token(f"refresh:{refresh_token}", {
-        "user_id": user.id,
-        "email": user.email,
-        "type": "refresh"
-    }, ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+    # Blacklist el token anterior y guardar los nuevos en un solo pipeline
+    pipe = RedisService.pipeline()
+    await RedisService.blacklist_token(token, pipe=pipe)
+    await RedisService.set_tokens(_token_entries(user, access_token, refresh_token), pipe=pipe)
+    await pipe.execute()
     
     return {
         "access_token": access_token,
@@ -1,27 +1,60 @@
-import redis
+import redis.asyncio as redis
 import json
+import hashlib
+import time
+from typing import List, Tuple
 from users.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Pool bloqueante: por encima de REDIS_MAX_CONNECTIONS los comandos esperan
+# una conexión libre (hasta REDIS_POOL_TIMEOUT) en lugar de fallar
+redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT
+))
 
 class RedisService:
     @staticmethod
-    def set_token(key: str, value: dict, ttl: int = settings.REDIS_TTL):
-        redis_client.setex(key, ttl, json.dumps(value))
+    def pipeline():
+        """Agrupa varios comandos en un solo viaje de ida y vuelta"""
+        return redis_client.pipeline(transaction=False)
     
     @staticmethod
-    def get_token(key: str) -> dict:
-        value = redis_client.get(key)
+    async def set_token(key: str, value: dict, ttl: int = settings.REDIS_TTL):
+        await redis_client.setex(key, ttl, json.dumps(value))
+    
+    @staticmethod
+    async def set_tokens(entries: List[Tuple[str, dict, int]], pipe=None):
+        """Guarda varios tokens (clave, valor, ttl) en un único pipeline"""
+        target = pipe if pipe is not None else RedisService.pipeline()
+        for key, value, ttl in entries:
+            target.setex(key, ttl, json.dumps(value))
+        if pipe is None:
+            await target.execute()
+    
+    @staticmethod
+    async def get_token(key: str) -> dict:
+        value = await redis_client.get(key)
         return json.loads(value) if value else None
     
     @staticmethod
-    def delete_token(key: str):
-        redis_client.delete(key)
+    async def delete_token(key: str):
+        await redis_client.delete(key)
     
     @staticmethod
-    def is_token_blacklisted(token: str) -> bool:
-        return redis_client.exists(f"blacklist:{token}")
+    async def is_token_blacklisted(token: str) -> bool:
+        return bool(await redis_client.exists(f"blacklist:{token}"))
     
     @staticmethod
-    def blacklist_token(token: str, ttl: int = settings.REDIS_TTL):
-        redis_client.setex(f"blacklist:{token}", ttl, "true")
\ No newline at end of file
+    async def blacklist_token(token: str, ttl: int = settings.REDIS_TTL, pipe=None):
+        """Revoca el token; con ``pipe`` solo encola los comandos"""
+        target = pipe if pipe is not None else RedisService.pipeline()
+        target.setex(f"blacklist:{token}", ttl, "true")
+        # Avisar a los servicios que cachean validaciones de tokens
+        target.publish(settings.AUTH_REVOCATION_CHANNEL, json.dumps({
+            "token_hash": hashlib.sha256(token.encode()).hexdigest(),
+            "expires_at": time.time() + ttl
+        }))
+        if pipe is None:
+            await target.execute()